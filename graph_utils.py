@@ -5,17 +5,22 @@ from matplotlib.ticker import FuncFormatter
 import sympy as sp
 from sympy import nsimplify, pi, E, latex
 from sympy.parsing.latex import parse_latex
+from sympy.parsing.sympy_parser import parse_expr
 import streamlit as st
 import io
-import warnings
+from functools import lru_cache
+from contourpy import contour_generator
+from scipy.special import gammaln, xlogy, xlog1py
 
 # Add this constant at the top with the other imports
 E = 2.7182818284590452  # Euler's number
 
+@lru_cache(maxsize=4096)
 def latex_to_python(latex_str, param_var='x'):
     """Converts LaTeX math expression to Python code.
     Returns (python_str, preview_expr) on success or (None, error_msg) on failure.
-    param_var: the variable to use in the expression (default 'x' for regular functions, 't' for parametric)"""
+    param_var: the variable to use in the expression (default 'x' for regular functions, 't' for parametric)
+    Results are memoized per input so unchanged text boxes skip the ANTLR parse on reruns."""
     try:
         # Handle \log(x) before parsing - replace with \log_{10}(x)
         if r'\log(' in latex_str and not r'\log_' in latex_str:
@@ -66,13 +71,18 @@ def latex_to_python(latex_str, param_var='x'):
     except Exception as e:
         return None, f"Invalid LaTeX: {str(e)}"
 
+@lru_cache(maxsize=256)
+def compile_expression(user_func):
+    """Byte-compile a function string once so repeated evaluations skip re-parsing."""
+    return compile(user_func, '<expression>', 'eval')
+
 def eval_function(user_func, x, lib, ylower=None, yupper=None, xlower=None, xupper=None, param_var='x'):
     """Evaluates the user-defined function with the given library (np or sp).
     For implicit functions, x should be a tuple of (x_sym, y_sym).
     For parametric functions, param_var should be 't'."""
     if isinstance(x, tuple):  # Handle implicit function case
         x_vals, y_vals = x[0], x[1]
-        result = eval(user_func, {"x": x_vals, "y": y_vals, "lib": lib})
+        result = eval(compile_expression(user_func), {"x": x_vals, "y": y_vals, "lib": lib})
         # Filter points outside plot boundaries for implicit functions
         if ylower is not None and yupper is not None and xlower is not None and xupper is not None:
             result[(y_vals < ylower) | (y_vals > yupper) | (x_vals < xlower) | (x_vals > xupper)] = np.nan
@@ -85,33 +95,128 @@ def eval_function(user_func, x, lib, ylower=None, yupper=None, xlower=None, xupp
             "log10": lib.log10,
             "E": E
         }
-        y = eval(user_func, eval_dict)
+        y = eval(compile_expression(user_func), eval_dict)
         
         if isinstance(x, np.ndarray):
+            if y is x:  # e.g. "y = x": don't NaN-mask the (possibly shared) input grid
+                y = y.copy()
             if param_var == 'x':  # For explicit functions
                 # Detect rapid changes
                 threshold_change = 10000
                 dy = lib.abs(lib.diff(y))
-                y[1:][dy > threshold_change] = lib.nan    # Handles asymptotes
-                y[:-1][dy > threshold_change] = lib.nan
+                jumps = dy > threshold_change
+                y[1:][jumps] = lib.nan    # Handles asymptotes
+                y[:-1][jumps] = lib.nan
                 
-                # Apply y-range filtering
+                # Apply y-range filtering in place. Out-of-range points become NaN
+                # (not clipped) so the curve leaves the viewport instead of running along its edge
                 if ylower is not None and yupper is not None:
-                    y[(y < ylower) | (y > yupper)] = np.nan
+                    outside = np.less(y, ylower)
+                    outside |= y > yupper
+                    np.copyto(y, np.nan, where=outside)
             else:  # For parametric functions
                 # Detect rapid changes in both x and y for parametric curves
                 threshold_change = 10000
                 if isinstance(y, np.ndarray):  # y coordinate
                     dy = lib.abs(lib.diff(y))
-                    y[1:][dy > threshold_change] = lib.nan
-                    y[:-1][dy > threshold_change] = lib.nan
+                    jumps = dy > threshold_change
+                    y[1:][jumps] = lib.nan
+                    y[:-1][jumps] = lib.nan
                     
                 # Filter points outside plot boundaries
                 if ylower is not None and yupper is not None and xlower is not None and xupper is not None:
-                    y[(y < ylower) | (y > yupper) | (x < xlower) | (x > xupper)] = lib.nan
+                    outside = np.less(y, ylower)
+                    outside |= y > yupper
+                    outside |= x < xlower
+                    outside |= x > xupper
+                    np.copyto(y, lib.nan, where=outside)
             
         return y
 
+@lru_cache(maxsize=8)
+def sample_grid(lower, upper, num_points):
+    """
+    Evenly spaced float32 sample points on [lower, upper], cached so every
+    curve plotted over the same axis range shares one read-only array.
+    """
+    grid = np.linspace(lower, upper, num_points, dtype=np.float32)
+    grid.setflags(write=False)
+    return grid
+
+def sympy_formatter(x, pos=None):
+    """Format a number as a LaTeX expression, preferring simple integers/fractions."""
+    try:
+        # Handle zero explicitly
+        if abs(x) < 1e-10:
+            return '$0$'
+
+        # Check if the number is very close to an integer
+        if np.isclose(x, round(x), atol=1e-8): # Check if close to integer
+             latex_str = f'{int(round(x))}' # Format as integer
+             return f'${latex_str}$'
+
+        # --- Revised Logic (from previous pi issue fix) ---
+        tolerance = 0.001 
+        expr_rational = nsimplify(x, tolerance=tolerance)
+        is_rational_accurate = abs(expr_rational.evalf() - x) < tolerance
+        expr_pi = nsimplify(x, [pi], tolerance=tolerance)
+        is_pi_accurate = abs(expr_pi.evalf() - x) < tolerance
+
+        if is_rational_accurate and isinstance(expr_rational, (sp.Integer, sp.Rational)):
+            final_expr = expr_rational
+        elif is_pi_accurate:
+             final_expr = expr_pi
+        elif is_rational_accurate: 
+             final_expr = expr_rational
+        else:
+             # Fallback: Check for integer again, otherwise use general format
+             if np.isclose(x, round(x), atol=1e-8):
+                  latex_str = f'{int(round(x))}'
+             else:
+                  latex_str = f'{x:.4g}' # Use more significant digits for fallback
+             return f'${latex_str}$' 
+
+        latex_str = latex(final_expr)
+        latex_str = latex_str.replace(r'\frac', r'\dfrac')
+
+    except (TypeError, AttributeError, ValueError):
+         # Fallback: Check for integer again, otherwise use general format
+         if np.isclose(x, round(x), atol=1e-8):
+              latex_str = f'{int(round(x))}'
+         else:
+              latex_str = f'{x:.4g}' # Use more significant digits for fallback
+         return f'${latex_str}$'
+
+    return f'${latex_str}$'
+
+def decimal_formatter(x, pos=None):
+    """Format a number as a standard decimal, avoiding early scientific notation."""
+    # Handle zero explicitly
+    if abs(x) < 1e-10: return '0' 
+
+    # Check if the number is very close to an integer
+    if np.isclose(x, round(x), atol=1e-8):
+        return f'{int(round(x))}' # Format as integer
+
+    # Use fixed point for reasonably small/large numbers, general otherwise
+    if 0.01 <= abs(x) < 10000: # Adjust range as needed
+        # Attempt to format with a few decimal places, removing trailing zeros/point
+        formatted = f'{x:.4f}'.rstrip('0').rstrip('.')
+        return formatted
+    else:
+        return f'{x:.4g}' # Use general format (allows scientific) for very large/small
+
+@lru_cache(maxsize=256)
+def format_tick_label(value, is_decimal):
+    """
+    Tick label for an axis value, cached per (value, format).
+    sympy_formatter runs nsimplify twice per tick, so reruns and the x/y axes
+    sharing tick values only pay for each distinct value once.
+    """
+    if is_decimal:
+        return decimal_formatter(value)
+    return sympy_formatter(value)
+
 def create_graph(xlower, xupper, ylower, yupper, xstep, ystep, gridstyle,
     xminordivisor, yminordivisor, imagewidth, imageheight,
     xuserlower, xuserupper, yuserlower, yuserupper,
@@ -152,69 +257,9 @@ def create_graph(xlower, xupper, ylower, yupper, xstep, ystep, gridstyle,
             ax.grid(True, which='minor', color='#999999', linestyle='-', alpha=0.2, linewidth=axis_weight*0.7, zorder=grid_zorder)
             ax.tick_params(which='minor', length=0)
 
-    def sympy_formatter(x, pos):
-        """Format a number as a LaTeX expression, preferring simple integers/fractions."""
-        try:
-            # Handle zero explicitly
-            if abs(x) < 1e-10:
-                return '$0$'
-
-            # Check if the number is very close to an integer
-            if np.isclose(x, round(x), atol=1e-8): # Check if close to integer
-                 latex_str = f'{int(round(x))}' # Format as integer
-                 return f'${latex_str}$'
-
-            # --- Revised Logic (from previous pi issue fix) ---
-            tolerance = 0.001 
-            expr_rational = nsimplify(x, tolerance=tolerance)
-            is_rational_accurate = abs(expr_rational.evalf() - x) < tolerance
-            expr_pi = nsimplify(x, [pi], tolerance=tolerance)
-            is_pi_accurate = abs(expr_pi.evalf() - x) < tolerance
-
-            if is_rational_accurate and isinstance(expr_rational, (sp.Integer, sp.Rational)):
-                final_expr = expr_rational
-            elif is_pi_accurate:
-                 final_expr = expr_pi
-            elif is_rational_accurate: 
-                 final_expr = expr_rational
-            else:
-                 # Fallback: Check for integer again, otherwise use general format
-                 if np.isclose(x, round(x), atol=1e-8):
-                      latex_str = f'{int(round(x))}'
-                 else:
-                      latex_str = f'{x:.4g}' # Use more significant digits for fallback
-                 return f'${latex_str}$' 
-
-            latex_str = latex(final_expr)
-            latex_str = latex_str.replace(r'\frac', r'\dfrac')
-            
-        except (TypeError, AttributeError, ValueError):
-             # Fallback: Check for integer again, otherwise use general format
-             if np.isclose(x, round(x), atol=1e-8):
-                  latex_str = f'{int(round(x))}'
-             else:
-                  latex_str = f'{x:.4g}' # Use more significant digits for fallback
-             return f'${latex_str}$'
-             
-        return f'${latex_str}$'
-        
-    def decimal_formatter(x, pos):
-        """Format a number as a standard decimal, avoiding early scientific notation."""
-        # Handle zero explicitly
-        if abs(x) < 1e-10: return '0' 
-        
-        # Check if the number is very close to an integer
-        if np.isclose(x, round(x), atol=1e-8):
-            return f'{int(round(x))}' # Format as integer
-        
-        # Use fixed point for reasonably small/large numbers, general otherwise
-        if 0.01 <= abs(x) < 10000: # Adjust range as needed
-            # Attempt to format with a few decimal places, removing trailing zeros/point
-            formatted = f'{x:.4f}'.rstrip('0').rstrip('.')
-            return formatted
-        else:
-            return f'{x:.4g}' # Use general format (allows scientific) for very large/small
-    # --- End of Decimal Formatter ---
+    def cached_formatter(x, pos):
+        """Look the tick label up in the module-level cache."""
+        return format_tick_label(round(float(x), 10), label_format_is_decimal)
 
     #------create the graph---------
                     
@@ -255,12 +300,9 @@ def create_graph(xlower, xupper, ylower, yupper, xstep, ystep, gridstyle,
 
     if showvalues:
         # --- Conditional Formatter Application ---
-        if label_format_is_decimal:
-            ax.xaxis.set_major_formatter(FuncFormatter(decimal_formatter))
-            ax.yaxis.set_major_formatter(FuncFormatter(decimal_formatter))
-        else:
-            ax.xaxis.set_major_formatter(FuncFormatter(sympy_formatter))
-            ax.yaxis.set_major_formatter(FuncFormatter(sympy_formatter))
+        # Decimal or sympy labels, selected inside the cached formatter
+        ax.xaxis.set_major_formatter(FuncFormatter(cached_formatter))
+        ax.yaxis.set_major_formatter(FuncFormatter(cached_formatter))
         # --- End of Conditional Formatter ---
 
         ax.tick_params(axis='both', 
@@ -316,26 +358,19 @@ def get_y_values_for_curve(x_fill, curve_points_x, curve_points_y, take_max=True
     x_sorted = x_valid[sort_idx]
     y_sorted = y_valid[sort_idx]
 
-    # Find y values for each x in x_fill
-    y_result = np.full_like(x_fill, np.nan) # Initialize with NaNs
-
-    # Use searchsorted for potentially faster lookups
-    # Find indices where x_fill values would be inserted into x_sorted
-    left_indices = np.searchsorted(x_sorted, x_fill, side='left')
-    right_indices = np.searchsorted(x_sorted, x_fill, side='right')
+    # Collapse points sharing an x value to their max (or min) y
+    group_starts = np.r_[0, np.flatnonzero(np.diff(x_sorted) > 0) + 1]
+    x_unique = x_sorted[group_starts]
+    reduce = np.maximum if take_max else np.minimum
+    y_unique = reduce.reduceat(y_sorted, group_starts)
 
-    for i, x in enumerate(x_fill):
-        # Get the slice of y_sorted corresponding to this x value
-        relevant_y_slice = y_sorted[left_indices[i]:right_indices[i]]
-        
-        if relevant_y_slice.size > 0:
-            with warnings.catch_warnings(): # Suppress warning on empty slice max/min
-                 warnings.simplefilter("ignore", category=RuntimeWarning)
-                 if take_max:
-                     y_result[i] = np.nanmax(relevant_y_slice)
-                 else:
-                     y_result[i] = np.nanmin(relevant_y_slice)
-        # else: y_result[i] remains NaN
+    # Find y values for each x in x_fill that lands exactly on a curve x
+    y_result = np.full_like(x_fill, np.nan) # Initialize with NaNs
+    indices = np.searchsorted(x_unique, x_fill, side='left')
+    in_range = indices < len(x_unique)
+    matched = np.zeros(len(x_fill), dtype=bool)
+    matched[in_range] = x_unique[indices[in_range]] == x_fill[in_range]
+    y_result[matched] = y_unique[indices[matched]]
 
     # Simple interpolation for NaNs between valid points (optional, can be slow)
     # This helps fill small gaps but might not be perfect for complex curves
@@ -352,3 +387,67 @@ def get_y_values_for_curve(x_fill, curve_points_x, curve_points_y, take_max=True
               pass # Ignore interpolation errors
 
     return y_result
+
+@lru_cache(maxsize=32)
+def binom_pmf(n, p):
+    """
+    Binomial probability mass function over every outcome k = 0..n.
+    Evaluated in log space with gammaln/xlogy rather than scipy.stats.binom,
+    and cached per (n, p) since the Binomial tab rarely changes them.
+    Returns (k_values, pmf_values) as read-only arrays.
+    """
+    k_values = np.arange(n + 1)
+    # log(k!) reversed is log((n-k)!), so one gammaln pass covers both terms
+    log_k_fact = gammaln(k_values + 1.0)
+    log_pmf = (log_k_fact[-1] - log_k_fact - log_k_fact[::-1]
+               + xlogy(k_values, p) + xlog1py(k_values[::-1], -p))
+    pmf_values = np.exp(log_pmf)
+    k_values.setflags(write=False)
+    pmf_values.setflags(write=False)
+    return k_values, pmf_values
+
+@lru_cache(maxsize=32)
+def compile_implicit(user_func):
+    """
+    Lambdify an implicit function string f(x, y) into a NumPy callable.
+    Cached per source string so reruns and areas reuse the generated code.
+    """
+    x_sym, y_sym = sp.symbols('x y')
+    expr = parse_expr(user_func, local_dict={"x": x_sym, "y": y_sym, "lib": sp, "np": np, "sp": sp})
+    if isinstance(expr, sp.Basic) and expr.free_symbols <= {x_sym, y_sym}:
+        # Fold exact constants like sin(1) or pi/3 to floats once, not per grid point
+        expr = expr.evalf()
+    return sp.lambdify((x_sym, y_sym), expr, modules=['numpy', {'ImmutableDenseMatrix': np.array}], cse=True)
+
+def contour_points(segments):
+    """
+    Concatenate contour line segments into (x_points, y_points) read-only
+    arrays, or None if every segment is empty.
+    """
+    segments = [seg for seg in segments if len(seg)]
+    if not segments:
+        return None
+    x_points = np.concatenate([seg[:, 0] for seg in segments])
+    y_points = np.concatenate([seg[:, 1] for seg in segments])
+    x_points.setflags(write=False)
+    y_points.setflags(write=False)
+    return x_points, y_points
+
+@lru_cache(maxsize=32)
+def implicit_curve_points(user_func, xlower, xupper, ylower, yupper, num_points=200):
+    """
+    Points on the zero contour of an implicit function over the plot window.
+    Cached per (function, window, resolution) so every area bounded by the
+    same curve shares one contour pass.
+    Returns (x_points, y_points) as read-only arrays, or None if the curve
+    does not cross the window.
+    """
+    f = compile_implicit(user_func)
+    x = np.linspace(xlower, xupper, num_points, dtype=np.float32)
+    y = np.linspace(ylower, yupper, num_points, dtype=np.float32)
+    X, Y = np.meshgrid(x, y, sparse=True, copy=False)
+    # Broadcast in case the function ignores x or y (e.g. "y - 1")
+    Z = np.broadcast_to(f(X, Y), (num_points, num_points))
+    # Trace the contour with matplotlib's engine directly, no throwaway figure
+    generator = contour_generator(x=x, y=y, z=np.ma.masked_invalid(Z), line_type="Separate")
+    return contour_points(generator.lines(0.0))
@@ -6,7 +6,10 @@ Provides functions to draw number lines with tick marks, labels, points, and int
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.patches import FancyArrowPatch, Circle, FancyBboxPatch
+from matplotlib.collections import LineCollection, PatchCollection
 from fractions import Fraction
+from functools import lru_cache
+from itertools import count
 
 
 def draw_number_line(ax, min_val, max_val, color, line_width, 
@@ -68,11 +71,10 @@ def draw_tick_marks(ax, min_val, max_val, step, color, line_width,
     # Generate tick positions
     ticks = np.arange(min_val, max_val + step/2, step)
     
-    for tick in ticks:
-        ax.plot([tick, tick], 
-                [y_position - tick_length/2, y_position + tick_length/2],
-                color=color, linewidth=line_width, zorder=zorder,
-                solid_capstyle='round')
+    # All ticks as a single LineCollection
+    ax.vlines(ticks, y_position - tick_length/2, y_position + tick_length/2,
+              color=color, linewidth=line_width, zorder=zorder,
+              capstyle='round')
     
     return ticks
 
@@ -96,16 +98,87 @@ def draw_minor_ticks(ax, min_val, max_val, major_step, divisions, color,
     """
     minor_step = major_step / divisions
     ticks = np.arange(min_val, max_val + minor_step/2, minor_step)
-    major_ticks = set(np.round(np.arange(min_val, max_val + major_step/2, major_step), 10))
+    major_ticks = np.round(np.arange(min_val, max_val + major_step/2, major_step), 10)
     
-    for tick in ticks:
-        # Skip major tick positions
-        if round(tick, 10) in major_ticks:
-            continue
-        ax.plot([tick, tick], 
-                [y_position - tick_length/2, y_position + tick_length/2],
-                color=color, linewidth=line_width * 0.7, zorder=zorder,
-                solid_capstyle='round')
+    # Skip major tick positions, then draw the rest as a single LineCollection
+    ticks = ticks[~np.isin(np.round(ticks, 10), major_ticks)]
+    ax.vlines(ticks, y_position - tick_length/2, y_position + tick_length/2,
+              color=color, linewidth=line_width * 0.7, zorder=zorder,
+              capstyle='round')
+
+
+def select_label_ticks(ticks, step, max_labels):
+    """
+    Choose which major ticks get a label so that at most about max_labels are drawn.
+    
+    Labels go on every n-th step with n a "nice" stride (1, 2, 5, 10, 20, ...),
+    counted from zero rather than from the first tick, so 0 and round
+    multiples are always among the labelled ticks.
+    
+    Args:
+        ticks: Array of major tick positions
+        step: Step between major ticks
+        max_labels: Maximum number of labels to draw
+    
+    Returns:
+        Array of tick positions to label
+    """
+    ticks = np.asarray(ticks, dtype=float)
+    if len(ticks) <= max_labels:
+        return ticks
+    
+    # Smallest nice stride whose labels fit
+    strides = (m * 10 ** e for e in count() for m in (1, 2, 5))
+    stride = next(n for n in strides if len(ticks) // n + 1 <= max_labels)
+    
+    # Offset of the tick grid from zero, for ranges that do not start on a multiple of step
+    phase = ticks[0] - step * np.round(ticks[0] / step)
+    multiples = (ticks - phase) / (step * stride)
+    return ticks[np.isclose(multiples, np.round(multiples), rtol=0, atol=1e-6)]
+
+
+@lru_cache(maxsize=4096)
+def _format_integer(value):
+    return f"${int(round(value))}$"
+
+
+@lru_cache(maxsize=4096)
+def _format_decimal(value):
+    if value == int(value):
+        return f"${int(value)}$"
+    return f"${value:.2g}$"
+
+
+@lru_cache(maxsize=4096)
+def _format_fraction(value, max_denominator=100):
+    if value == int(value):
+        return f"${int(value)}$"
+    frac = Fraction(value).limit_denominator(max_denominator)
+    if frac.denominator == 1:
+        return f"${frac.numerator}$"
+    return f"$\\frac{{{frac.numerator}}}{{{frac.denominator}}}$"
+
+
+@lru_cache(maxsize=4096)
+def _format_auto(value, max_denominator=100):
+    if value == int(value):
+        return f"${int(value)}$"
+    # Try fraction first
+    frac = Fraction(value).limit_denominator(max_denominator)
+    if abs(float(frac) - value) < 1e-9:
+        if frac.denominator == 1:
+            return f"${frac.numerator}$"
+        return f"$\\frac{{{frac.numerator}}}{{{frac.denominator}}}$"
+    return f"${value:.2g}$"
+
+
+# Label formatter for each format type, resolved once per set of labels
+_FORMATTERS = {
+    'integer': _format_integer,
+    'decimal': _format_decimal,
+    'fraction': _format_fraction,
+    'auto': _format_auto,
+}
 
 
 def format_tick_label(value, format_type='auto', max_denominator=100):
@@ -120,29 +193,11 @@ def format_tick_label(value, format_type='auto', max_denominator=100):
     Returns:
         Formatted string
     """
-    if format_type == 'integer':
-        return f"${int(round(value))}$"
-    elif format_type == 'decimal':
-        if value == int(value):
-            return f"${int(value)}$"
-        return f"${value:.2g}$"
-    elif format_type == 'fraction':
-        if value == int(value):
-            return f"${int(value)}$"
-        frac = Fraction(value).limit_denominator(max_denominator)
-        if frac.denominator == 1:
-            return f"${frac.numerator}$"
-        return f"$\\frac{{{frac.numerator}}}{{{frac.denominator}}}$"
-    else:  # auto
-        if value == int(value):
-            return f"${int(value)}$"
-        # Try fraction first
-        frac = Fraction(value).limit_denominator(max_denominator)
-        if abs(float(frac) - value) < 1e-9:
-            if frac.denominator == 1:
-                return f"${frac.numerator}$"
-            return f"$\\frac{{{frac.numerator}}}{{{frac.denominator}}}$"
-        return f"${value:.2g}$"
+    formatter = _FORMATTERS.get(format_type, _format_auto)
+    # Only the fraction-based formatters take a denominator limit
+    if formatter in (_format_fraction, _format_auto):
+        return formatter(float(value), max_denominator)
+    return formatter(float(value))
 
 
 def draw_tick_labels(ax, ticks, color, font_size, format_type='auto',
@@ -166,35 +221,45 @@ def draw_tick_labels(ax, ticks, color, font_size, format_type='auto',
         bbox_props = dict(boxstyle='round,pad=0.1', facecolor='white',
                          edgecolor='none', alpha=0.9)
     
+    formatter = _FORMATTERS.get(format_type, _format_auto)
     for tick in ticks:
-        label = format_tick_label(tick, format_type)
+        label = formatter(float(tick))
         ax.text(tick, y_position - offset, label,
                 fontsize=font_size, color=color,
                 ha='center', va='top', zorder=zorder,
                 bbox=bbox_props)
 
 
-def draw_point(ax, position, color, marker_size, marker_style='filled',
-               y_position=0, zorder=25):
+def draw_points(ax, positions, colors, marker_size, marker_styles,
+                y_position=0, zorder=25):
     """
-    Draw a point on the number line.
+    Draw several points on the number line with one scatter per marker style.
     
     Args:
         ax: Matplotlib axes
-        position: X position on the line
-        color: Point color
-        marker_size: Size of the marker
-        marker_style: 'filled' (solid dot) or 'open' (hollow circle)
+        positions: X positions on the line
+        colors: Point colors, one per position
+        marker_size: Size of the markers
+        marker_styles: 'filled' or 'open', one per position
         y_position: Vertical position of the line
         zorder: Drawing order
     """
-    if marker_style == 'filled':
-        ax.plot(position, y_position, 'o', color=color, markersize=marker_size,
-                zorder=zorder)
-    else:  # open
-        ax.plot(position, y_position, 'o', color=color, markersize=marker_size,
-                markerfacecolor='white', markeredgewidth=marker_size/4,
-                zorder=zorder)
+    positions = np.asarray(positions, dtype=float)
+    colors = np.asarray(colors, dtype=object)
+    open_mask = np.asarray(marker_styles) == 'open'
+    
+    # scatter sizes are in points squared, so square the marker size
+    filled_mask = ~open_mask
+    if filled_mask.any():
+        ax.scatter(positions[filled_mask], np.full(filled_mask.sum(), y_position),
+                   s=marker_size**2, c=list(colors[filled_mask]),
+                   edgecolors=list(colors[filled_mask]), linewidths=1.0,
+                   marker='o', zorder=zorder)
+    if open_mask.any():
+        ax.scatter(positions[open_mask], np.full(open_mask.sum(), y_position),
+                   s=marker_size**2, facecolors='white',
+                   edgecolors=list(colors[open_mask]), linewidths=marker_size/4,
+                   marker='o', zorder=zorder)
 
 
 def draw_point_label(ax, position, label_text, color, font_size,
@@ -231,80 +296,71 @@ def draw_point_label(ax, position, label_text, color, font_size,
             ha='center', va=va, zorder=zorder, bbox=bbox_props)
 
 
-def draw_interval(ax, start, end, color, line_width, y_position=0,
-                  start_style='closed', end_style='closed',
-                  interval_offset=0.15, zorder=20):
+def draw_intervals(ax, intervals, line_width, y_position=0,
+                   interval_offset=0.15, zorder=20):
     """
-    Draw an interval/range on the number line.
+    Draw several intervals: all interval lines as one LineCollection and
+    the closed/open endpoints as batched points.
     
     Args:
         ax: Matplotlib axes
-        start: Start value
-        end: End value
-        color: Interval color
+        intervals: Sequence of (start, end, color, start_style, end_style)
         line_width: Line width
         y_position: Vertical position of the line
-        start_style: 'closed' (filled dot), 'open' (hollow), or 'arrow'
-        end_style: 'closed', 'open', or 'arrow'
-        interval_offset: Vertical offset for the interval line
+        interval_offset: Vertical offset for the interval lines
         zorder: Drawing order
     """
+    if not intervals:
+        return
     y = y_position + interval_offset
     
-    # Draw the interval line
-    ax.plot([start, end], [y, y], color=color, linewidth=line_width * 1.5,
-            zorder=zorder, solid_capstyle='butt')
-    
-    # Draw endpoint markers
-    marker_size = line_width * 4
-    
-    # Start endpoint
-    if start_style == 'closed':
-        ax.plot(start, y, 'o', color=color, markersize=marker_size, zorder=zorder+1)
-    elif start_style == 'open':
-        ax.plot(start, y, 'o', color=color, markersize=marker_size,
-                markerfacecolor='white', markeredgewidth=marker_size/4, zorder=zorder+1)
-    elif start_style == 'arrow':
-        # Arrow pointing left (to negative infinity)
-        ax.annotate('', xy=(start - 0.3, y), xytext=(start, y),
-                   arrowprops=dict(arrowstyle='->', color=color, lw=line_width * 1.5),
-                   zorder=zorder+1)
-    
-    # End endpoint
-    if end_style == 'closed':
-        ax.plot(end, y, 'o', color=color, markersize=marker_size, zorder=zorder+1)
-    elif end_style == 'open':
-        ax.plot(end, y, 'o', color=color, markersize=marker_size,
-                markerfacecolor='white', markeredgewidth=marker_size/4, zorder=zorder+1)
-    elif end_style == 'arrow':
-        # Arrow pointing right (to positive infinity)
-        ax.annotate('', xy=(end + 0.3, y), xytext=(end, y),
-                   arrowprops=dict(arrowstyle='->', color=color, lw=line_width * 1.5),
-                   zorder=zorder+1)
-
-
-def draw_interval_fill(ax, start, end, color, alpha=0.3, y_position=0,
-                       height=0.4, zorder=5):
+    ax.add_collection(LineCollection(
+        [[(start, y), (end, y)] for start, end, _, _, _ in intervals],
+        colors=[color for _, _, color, _, _ in intervals],
+        linewidths=line_width * 1.5, capstyle='butt', zorder=zorder))
+    
+    # Endpoint markers, with arrows pointing off to -inf (start) or +inf (end)
+    marker_positions, marker_colors, marker_styles = [], [], []
+    for start, end, color, start_style, end_style in intervals:
+        for position, style, direction in ((start, start_style, -1), (end, end_style, 1)):
+            if style == 'arrow':
+                ax.annotate('', xy=(position + 0.3 * direction, y), xytext=(position, y),
+                           arrowprops=dict(arrowstyle='->', color=color, lw=line_width * 1.5),
+                           zorder=zorder+1)
+            elif style in ('closed', 'open'):
+                marker_positions.append(position)
+                marker_colors.append(color)
+                marker_styles.append('filled' if style == 'closed' else 'open')
+    
+    if marker_positions:
+        draw_points(ax, marker_positions, marker_colors, line_width * 4, marker_styles,
+                    y_position=y, zorder=zorder+1)
+
+
+def draw_interval_fills(ax, intervals, alpha=0.3, y_position=0,
+                        height=0.4, zorder=5):
     """
-    Draw a filled region for an interval.
+    Draw filled regions for several intervals as one PatchCollection.
     
     Args:
         ax: Matplotlib axes
-        start: Start value
-        end: End value
-        color: Fill color
+        intervals: Sequence of (start, end, color)
         alpha: Fill transparency
         y_position: Vertical position of the line
-        height: Height of the filled region
+        height: Height of the filled regions
         zorder: Drawing order
     """
-    rect = FancyBboxPatch(
-        (start, y_position - height/2), end - start, height,
-        boxstyle="round,pad=0.02,rounding_size=0.1",
-        facecolor=color, alpha=alpha, edgecolor='none',
-        zorder=zorder
-    )
-    ax.add_patch(rect)
+    if not intervals:
+        return
+    patches = [
+        FancyBboxPatch(
+            (start, y_position - height/2), end - start, height,
+            boxstyle="round,pad=0.02,rounding_size=0.1",
+            facecolor=color, alpha=alpha, edgecolor='none'
+        )
+        for start, end, color in intervals
+    ]
+    ax.add_collection(PatchCollection(patches, match_original=True, zorder=zorder))
 
 
 def draw_brace(ax, start, end, color, line_width, y_position=0,
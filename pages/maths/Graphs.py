@@ -1,15 +1,18 @@
 import numpy as np
 from matplotlib.animation import FuncAnimation
-import matplotlib.pyplot as plt
 from matplotlib.ticker import FuncFormatter
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.colors import to_rgba
 import sympy as sp
 from sympy import nsimplify, pi, E, latex
 import streamlit as st
 import io
+import gzip
+from bisect import bisect_left
 from numpy import log, log10 
-from scipy.stats import binom 
 
-from graph_utils import create_graph, eval_function, latex_to_python, get_y_values_for_curve
+from graph_utils import create_graph, eval_function, latex_to_python, get_y_values_for_curve, binom_pmf, sample_grid, compile_implicit, implicit_curve_points, contour_points
+from shared_utils import figure_to_png
 
 sp.arcsin = sp.asin
 sp.arccos = sp.acos
@@ -24,9 +27,32 @@ MY_COLORS = {
     'pink': '#F688C9',
     'grey': '#4C5B64'
 }
+MY_COLOR_NAMES = tuple(MY_COLORS.keys())  # Options for every color selectbox
 
 PI = 3.1415927
 
+# Expressions pre-filled in the function tabs
+DEFAULT_EXPLICIT = r"\frac{x}{2}-\sin(x)"
+DEFAULT_IMPLICIT = r"x^2 + y^2 - 1"
+DEFAULT_PARAMETRIC = (r"\cos(t)", r"\sin(t)")
+
+
+@st.cache_resource(show_spinner="Loading the expression parser...")
+def warm_up_expression_pipeline():
+    """Push the default expressions through LaTeX parsing and lambdify once per
+    server process, so the ANTLR parser and SymPy's printers are loaded up front.
+    Calls match the tabs' own so the memoized results are reused on first render."""
+    latex_to_python(DEFAULT_EXPLICIT)
+    for latex_str in DEFAULT_PARAMETRIC:
+        latex_to_python(latex_str, param_var='t')
+    python_str, _ = latex_to_python(DEFAULT_IMPLICIT)
+    if python_str:
+        compile_implicit(python_str)
+    return True
+
+
+warm_up_expression_pipeline()
+
 
 #-------SIDEBAR--------------------
 
@@ -106,13 +132,12 @@ with st.sidebar:
     st.write("")  # Adds vertical space
     white_background = st.toggle("White background", value=False)
 
+    png_dpi = st.select_slider("PNG resolution (dpi)", options=[100, 150, 200, 300], value=300)
 
-#-------INITIAL PLOT-------------------------
 
-x_init = np.linspace(xlower, xupper, 100000)
-y_init = np.zeros_like(x_init)  # Create corresponding y values
+#-------INITIAL PLOT-------------------------
 
-fig, ax = create_graph(
+graph_settings = dict(
     xlower=xlower,
     xupper=xupper,
     ylower=ylower,
@@ -135,8 +160,8 @@ fig, ax = create_graph(
     label_format_is_decimal=label_format_is_decimal,
     skip_static_plots=False  # or True if you want to skip plotting static data
 )
+fig, ax = create_graph(**graph_settings)
 
-ax.plot(x_init, y_init, alpha=0)  # Plot invisible points
 ax.margins(x=0, y=0)  # Remove margins
 fig.subplots_adjust(left=0, right=1, bottom=0, top=1, wspace=0, hspace=0)  # Remove all padding
 ax.set_xlim(xlower, xupper)  # Force exact limits
@@ -145,11 +170,12 @@ ax.set_ylim(ylower, yupper)  # Force exact limits
 
 #-------ADD FUNCTIONS-------------------------
 
+# Fixed-size slot lists: one entry per input row, None while unplotted
 if "plotted_functions" not in st.session_state:
-    st.session_state.plotted_functions = []  # List to store function data
+    st.session_state.plotted_functions = [None] * 5  # List to store function data
 
 if "plotted_points" not in st.session_state:
-    st.session_state.plotted_points = []
+    st.session_state.plotted_points = [None] * 8
 
 if "plot_data" not in st.session_state:
     st.session_state.plot_data = {"x": None, "y": None, "function": None}
@@ -161,10 +187,10 @@ if "selected_line_style" not in st.session_state:
     st.session_state.selected_line_style = "-"  # Default line style
 
 if "plotted_implicit_functions" not in st.session_state:
-    st.session_state.plotted_implicit_functions = []
+    st.session_state.plotted_implicit_functions = [None] * 5
 
 if "plotted_parametric_functions" not in st.session_state:
-    st.session_state.plotted_parametric_functions = []
+    st.session_state.plotted_parametric_functions = [None] * 5
 
 # --- Add state for multiple areas ---
 if "plotted_areas" not in st.session_state:
@@ -195,6 +221,8 @@ with master_col1:
         svg_placeholder = st.empty()
     with download_columns[2]:
         png_placeholder = st.empty()
+    with download_columns[3]:
+        svgz_placeholder = st.empty()
 
 with master_col2:
     tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
@@ -209,119 +237,59 @@ with master_col2:
     with tab1:
         st.subheader("Plot explicit functions", divider="gray")
         
-        # Initialize conversion variables
-        python_str = None
-        preview_expr = None
-        
-        # Input row
-        col1, col2, col3, col4 = st.columns([3, 1, 1, 1], vertical_alignment="bottom")
-        
-        with col1:
-            latex_input = st.text_input(f"Function 1", 
-                                      value=r"\frac{x}{2}-\sin(x)",
-                                      key=f"latex_function_1")
-        
-        with col2:
-            color_choice = st.selectbox("Color", 
-                                      options=list(MY_COLORS.keys()), 
-                                      key=f"latex_color_1",
-                                      index=0,
-                                      label_visibility="collapsed")
-        
-        with col3:
-            line_styles = ("solid", "dashed", "dotted")
-            line_style_choice = st.selectbox("Line style", 
-                                           line_styles,
-                                           key=f"latex_style_1",
-                                           index=0,
-                                           label_visibility="collapsed")
-            
-            line_style = {
-                "solid": "-",
-                "dashed": "--",
-                "dotted": ":"
-            }[line_style_choice]
-        
-        # Do LaTeX conversion here so python_str is available for plot button
-        if latex_input.strip():
-            python_str, preview_expr = latex_to_python(latex_input)
-        
-        with col4:
-            if st.button("Plot", key=f"latex_plot_1"):
-                if latex_input.strip() and python_str:
-                    x = np.linspace(xlower, xupper, 100000)
-                    y = eval_function(python_str, x, np, ylower, yupper)
-                    
-                    st.session_state.plot_counter += 1
-                    func_data = {
-                        "x": x,
-                        "y": y,
-                        "function": python_str,
-                        "color": color_choice,
-                        "line_style": line_style,
-                        "zorder": 10 + st.session_state.plot_counter  # Base zorder of 10 for all functions
-                    }
-                    
-                    if 0 < len(st.session_state.plotted_functions):
-                        st.session_state.plotted_functions[0] = func_data
-                    else:
-                        st.session_state.plotted_functions.append(func_data)
-
-        # Add remaining 4 function inputs
-        for i in range(2, 6):  # Functions 2-5
+        # Create up to 5 explicit function input rows
+        for i in range(1, 6):
             col1, col2, col3, col4 = st.columns([3, 1, 1, 1], vertical_alignment="bottom")
             
             with col1:
-                latex_input_i = st.text_input(f"Function {i}", 
-                                            value="",
-                                            key=f"latex_function_{i}")
+                default_value = r"\frac{x}{2}-\sin(x)" if i == 1 else ""
+                latex_input = st.text_input(f"Function {i}", 
+                                          value=default_value,
+                                          key=f"latex_function_{i}")
             
             with col2:
-                color_choice_i = st.selectbox("Color", 
-                                            options=list(MY_COLORS.keys()), 
-                                            key=f"latex_color_{i}",
-                                            index=0,
-                                            label_visibility="collapsed")
+                color_choice = st.selectbox("Color", 
+                                          options=MY_COLOR_NAMES, 
+                                          key=f"latex_color_{i}",
+                                          index=0,
+                                          label_visibility="collapsed")
             
             with col3:
-                line_style_choice_i = st.selectbox("Line style", 
-                                                 line_styles,
-                                                 key=f"latex_style_{i}",
-                                                 index=0,
-                                                 label_visibility="collapsed")
+                line_styles = ("solid", "dashed", "dotted")
+                line_style_choice = st.selectbox("Line style", 
+                                               line_styles,
+                                               key=f"latex_style_{i}",
+                                               index=0,
+                                               label_visibility="collapsed")
                 
-                line_style_i = {
+                line_style = {
                     "solid": "-",
                     "dashed": "--",
                     "dotted": ":"
-                }[line_style_choice_i]
+                }[line_style_choice]
             
-            # Do LaTeX conversion
-            python_str_i = None
-            if latex_input_i.strip():
-                python_str_i, _ = latex_to_python(latex_input_i)
+            # Do LaTeX conversion here so python_str is available for plot button
+            python_str = None
+            if latex_input.strip():
+                python_str, _ = latex_to_python(latex_input)
             
             with col4:
                 if st.button("Plot", key=f"latex_plot_{i}"):
-                    if latex_input_i.strip() and python_str_i:
-                        x = np.linspace(xlower, xupper, 100000)
-                        y = eval_function(python_str_i, x, np, ylower, yupper)
+                    if latex_input.strip() and python_str:
+                        x = sample_grid(xlower, xupper, 100000)  # shared float32 grid for all explicit functions
+                        y = eval_function(python_str, x, np, ylower, yupper)
                         
                         st.session_state.plot_counter += 1
                         func_data = {
                             "x": x,
                             "y": y,
-                            "function": python_str_i,
-                            "color": color_choice_i,
-                            "line_style": line_style_i,
+                            "function": python_str,
+                            "color": color_choice,
+                            "line_style": line_style,
                             "zorder": 10 + st.session_state.plot_counter  # Base zorder of 10 for all functions
                         }
-                        
-                        if i-1 < len(st.session_state.plotted_functions):
-                            st.session_state.plotted_functions[i-1] = func_data
-                        else:
-                            st.session_state.plotted_functions.append(func_data)
-                            
+                        st.session_state.plotted_functions[i-1] = func_data
+
         st.caption("Enter functions of $x$ in latex.")
 
     with tab2:
@@ -339,7 +307,7 @@ with master_col2:
             
             with col2:
                 color_choice = st.selectbox("Color", 
-                                      options=list(MY_COLORS.keys()), 
+                                      options=MY_COLOR_NAMES, 
                                       key=f"implicit_color_{i}",
                                       index=0,
                                       label_visibility="collapsed")
@@ -373,11 +341,7 @@ with master_col2:
                             "line_style": line_style,
                             "zorder": 10 + st.session_state.plot_counter  # Base zorder of 10 for all functions
                         }
-                        
-                        if i < len(st.session_state.plotted_implicit_functions):
-                            st.session_state.plotted_implicit_functions[i] = implicit_data
-                        else:
-                            st.session_state.plotted_implicit_functions.append(implicit_data)
+                        st.session_state.plotted_implicit_functions[i] = implicit_data
 
         st.caption("Entering $f(x,y)$ will plot the curve $f(x,y) = 0$.\n\nFor example, $x^2 + y^2 - 1$ plots the unit circle.")
 
@@ -404,7 +368,7 @@ with master_col2:
                                       key=f"param_range_{i}")
             with col4:
                 color_choice = st.selectbox(" ",  # Invisible label
-                                          options=list(MY_COLORS.keys()), 
+                                          options=MY_COLOR_NAMES, 
                                           key=f"param_color_{i}",
                                           index=0,
                                           label_visibility="collapsed")
@@ -445,26 +409,27 @@ with master_col2:
                             t_end = float(eval(t_end_python.replace("π", str(PI))))
                             
                             # Create t values
-                            t = np.linspace(t_start, t_end, 1000)
+                            t = np.linspace(t_start, t_end, 1000, dtype=np.float32)
                             
                             # Evaluate x(t) and y(t)
                             x = eval_function(x_python, t, np, xlower, xupper, xlower, xupper, param_var='t')
                             y = eval_function(y_python, t, np, ylower, yupper, xlower, xupper, param_var='t')
                             
+                            # Drop NaN samples once here rather than on every rerun
+                            valid_mask = ~(np.isnan(x) | np.isnan(y))
+                            
                             st.session_state.plot_counter += 1
                             param_data = {
                                 "x": x,
                                 "y": y,
+                                "x_clean": x[valid_mask],
+                                "y_clean": y[valid_mask],
                                 "function": (x_python, y_python),
                                 "color": color_choice,
                                 "line_style": line_style,
                                 "zorder": 10 + st.session_state.plot_counter
                             }
-                            
-                            if i < len(st.session_state.plotted_parametric_functions):
-                                st.session_state.plotted_parametric_functions[i] = param_data
-                            else:
-                                st.session_state.plotted_parametric_functions.append(param_data)
+                            st.session_state.plotted_parametric_functions[i] = param_data
                         except Exception as e:
                             st.error(f"Error plotting parametric function: {str(e)}")
             
@@ -488,7 +453,7 @@ with master_col2:
                 
             with col3:
                 point_color = st.selectbox("Color", 
-                                         options=list(MY_COLORS.keys()), 
+                                         options=MY_COLOR_NAMES, 
                                          key=f"point_color_{i}",
                                          label_visibility="collapsed")
             
@@ -507,11 +472,7 @@ with master_col2:
                         "marker": marker,
                         "color": point_color
                     }
-                    
-                    if i < len(st.session_state.plotted_points):
-                        st.session_state.plotted_points[i] = point_data
-                    else:
-                        st.session_state.plotted_points.append(point_data)
+                    st.session_state.plotted_points[i] = point_data
 
     with tab5:
         st.subheader("Plot areas", divider="gray")
@@ -600,7 +561,7 @@ with master_col2:
                 x_end = st.number_input("Upper $x$", value=default_x_end, key=x_end_key)
             with col6:
                  # Get index for default color
-                color_options = list(MY_COLORS.keys())
+                color_options = MY_COLOR_NAMES
                 try:
                      color_idx = color_options.index(default_color)
                 except ValueError:
@@ -689,7 +650,7 @@ with master_col2:
             bcol4, bcol5, bcol6 = st.columns([1, 1, 1], vertical_alignment="bottom") # Layout columns
             with bcol4:
                  # Get index for default color
-                color_options = list(MY_COLORS.keys())
+                color_options = MY_COLOR_NAMES
                 try:
                      color_idx = color_options.index(default_color)
                 except ValueError:
@@ -719,82 +680,113 @@ with master_col2:
         st.caption("Plots the probability mass function $P(X=k)$ for $k=0, 1, ..., n$.")
 
 
+line_curves = []  # (curve data, x, y) for explicit and parametric functions
 for func_data in st.session_state.plotted_functions:
+    if func_data is None:
+        continue
     if "zorder" not in func_data:
         st.session_state.plot_counter += 1
         func_data["zorder"] = st.session_state.plot_counter
-    
-    ax.plot(
-        func_data["x"],
-        func_data["y"],
-        color=MY_COLORS[func_data["color"]],
-        linestyle=func_data["line_style"],
-        linewidth=axis_weight * 1.3,
-        zorder=func_data["zorder"])
+    line_curves.append((func_data, func_data["x"], func_data["y"]))
 
+for param_data in st.session_state.plotted_parametric_functions:
+    if param_data:
+        if "x_clean" not in param_data:
+            # Filter out NaN values before plotting
+            valid_mask = ~(np.isnan(param_data["x"]) | np.isnan(param_data["y"]))
+            param_data["x_clean"] = param_data["x"][valid_mask]
+            param_data["y_clean"] = param_data["y"][valid_mask]
+        line_curves.append((param_data, param_data["x_clean"], param_data["y_clean"]))
+
+# Draw the curves as LineCollections, splitting only where an implicit
+# contour falls between them in the stacking order
+implicit_zorders = sorted(implicit_data["zorder"]
+                          for implicit_data in st.session_state.plotted_implicit_functions
+                          if implicit_data and "zorder" in implicit_data)
+line_groups = {}
+for curve in sorted(line_curves, key=lambda curve: curve[0]["zorder"]):
+    line_groups.setdefault(bisect_left(implicit_zorders, curve[0]["zorder"]), []).append(curve)
+
+for group in line_groups.values():
+    ax.add_collection(LineCollection(
+        [np.column_stack((x_vals, y_vals)) for _, x_vals, y_vals in group],
+        colors=[MY_COLORS[curve_data["color"]] for curve_data, _, _ in group],
+        linestyles=[curve_data["line_style"] for curve_data, _, _ in group],
+        linewidths=axis_weight * 1.3,
+        zorder=group[0][0]["zorder"]),
+        autolim=False)
+
+# Points sharing a marker and color are drawn as one marker-only line
+point_groups = {}
 for point_data in st.session_state.plotted_points:
+    if point_data is None:
+        continue
     if "zorder" not in point_data:
         st.session_state.plot_counter += 1
         point_data["zorder"] = 1000 + st.session_state.plot_counter  # Much higher base zorder for points
-        
-    if point_data["marker"] == "x":
+    point_groups.setdefault((point_data["marker"], point_data["color"]), []).append(point_data)
+
+for (marker, color), group in point_groups.items():
+    if marker == "x":
         markersize = axis_weight * 6
         markeredgewidth = axis_weight
     else:  # circle
         markersize = axis_weight * 3
         markeredgewidth = axis_weight
     
-    ax.plot(point_data["x"], 
-           point_data["y"], 
-           marker=point_data["marker"],
-           color=MY_COLORS[point_data["color"]], 
+    ax.plot([point_data["x"] for point_data in group], 
+           [point_data["y"] for point_data in group], 
+           marker=marker,
+           color=MY_COLORS[color], 
            markersize=markersize,
            markeredgewidth=markeredgewidth,
            linestyle='none',
-           zorder=point_data["zorder"])
+           zorder=max(point_data["zorder"] for point_data in group))
 
-# Plot all stored implicit functions
-for implicit_data in st.session_state.plotted_implicit_functions:
+# Plot all stored implicit functions, keeping each curve's points for the area loop
+implicit_curves = {}
+for implicit_idx, implicit_data in enumerate(st.session_state.plotted_implicit_functions):
     if implicit_data and implicit_data["function"].strip():
         if "zorder" not in implicit_data:
             st.session_state.plot_counter += 1
             implicit_data["zorder"] = st.session_state.plot_counter
             
-        x = np.linspace(xlower, xupper, 1000)
-        y = np.linspace(ylower, yupper, 1000)
-        X, Y = np.meshgrid(x, y)
-        
-        # Evaluate the expression
-        x_sym, y_sym = sp.symbols('x y')
-        expr = eval(implicit_data["function"], {
-            "x": x_sym, 
-            "y": y_sym, 
-            "lib": sp  # This is what users expect to use
-        })
+        x = np.linspace(xlower, xupper, 1000, dtype=np.float32)
+        y = np.linspace(ylower, yupper, 1000, dtype=np.float32)
+        X, Y = np.meshgrid(x, y, sparse=True, copy=False)
         
-        # Convert to numpy function and plot
-        f = sp.lambdify((x_sym, y_sym), expr)
-        Z = f(X, Y)
+        # Evaluate with the cached numpy function and plot
+        f = compile_implicit(implicit_data["function"])
+        Z = np.broadcast_to(f(X, Y), (len(y), len(x)))
         
-        ax.contour(X, Y, Z, levels=[0], 
+        cs = ax.contour(x, y, Z, levels=[0], 
                   colors=[MY_COLORS[implicit_data["color"]]],
                   linestyles=[implicit_data["line_style"]],
                   linewidths=axis_weight * 1.3,
                   zorder=implicit_data["zorder"])
-
-for param_data in st.session_state.plotted_parametric_functions:
-    if param_data:
-        # Filter out NaN values before plotting
-        valid_mask = ~(np.isnan(param_data["x"]) | np.isnan(param_data["y"]))
-        ax.plot(
-            param_data["x"][valid_mask],
-            param_data["y"][valid_mask],
-            color=MY_COLORS[param_data["color"]],
-            linestyle=param_data["line_style"],
-            linewidth=axis_weight * 1.3,
-            zorder=param_data["zorder"])
+        implicit_curves[implicit_idx] = contour_points(cs.allsegs[0])
 
 # --- Add loop for plotting AREAS ---
+# Areas are collected as polygons and drawn together after the loop
+area_polygons = []
+area_facecolors = []
+# Areas over the same x range share one grid, and each boundary is evaluated
+# once per (function, side, range) however many areas use it. Boundaries are
+# keyed on content rather than slot and carried over to the next rerun, so
+# areas whose functions and ranges are unchanged are not recomputed.
+area_grids = {}
+previous_area_boundaries = st.session_state.get("area_boundary_memo", {})
+area_boundaries = {}
+area_window = (xlower, xupper, ylower, yupper)
+
+def area_boundary(key, compute):
+    if key not in area_boundaries:
+        if key in previous_area_boundaries:
+            area_boundaries[key] = previous_area_boundaries[key]
+        else:
+            area_boundaries[key] = compute()
+    return area_boundaries[key]
+
 for i, area_data in enumerate(st.session_state.plotted_areas):
     if area_data is not None:
         # Extract parameters for this area
@@ -804,11 +796,6 @@ for i, area_data in enumerate(st.session_state.plotted_areas):
         x_end = area_data["x_end"]
         fill_color = area_data["color"]
         opacity = area_data["opacity"]
-        # REMOVE zorder extraction: zorder = area_data["zorder"]
-        
-        # --- Assign low zorder for areas ---
-        zorder_value = 1.0 + i * 0.01 # e.g., 1.0, 1.01, 1.02
-        # --- End assignment ---
 
         try:
             # Get x values for the fill
@@ -822,7 +809,9 @@ for i, area_data in enumerate(st.session_state.plotted_areas):
                  st.warning(f"Area {i+1}: Lower x and Upper x are the same. Skipping fill.")
                  continue # Skip to next area
                  
-            x_fill = np.linspace(x_start, x_end, 500) # Reduced points for performance
+            if (x_start, x_end) not in area_grids:
+                area_grids[(x_start, x_end)] = np.linspace(x_start, x_end, 500, dtype=np.float32) # Reduced points for performance
+            x_fill = area_grids[(x_start, x_end)]
 
             # Initialize y arrays
             upper_y = None
@@ -833,38 +822,31 @@ for i, area_data in enumerate(st.session_state.plotted_areas):
                 upper_y = np.full_like(x_fill, yupper + 0.025 * ydifference)
             elif first_func_idx.startswith("Explicit"):
                 idx = int(first_func_idx.split()[1]) - 1
-                if idx < len(st.session_state.plotted_functions) and st.session_state.plotted_functions[idx]:
-                     upper_y = eval_function(st.session_state.plotted_functions[idx]["function"], x_fill, np, ylower, yupper)
+                if st.session_state.plotted_functions[idx]:
+                     upper_y = area_boundary(("Explicit", st.session_state.plotted_functions[idx]["function"], area_window, x_start, x_end),
+                                             lambda: eval_function(st.session_state.plotted_functions[idx]["function"], x_fill, np, ylower, yupper))
                 else: upper_y = np.full_like(x_fill, np.nan) # Function doesn't exist
             elif first_func_idx.startswith("Implicit"):
                 idx = int(first_func_idx.split()[1]) - 1
-                if idx < len(st.session_state.plotted_implicit_functions) and st.session_state.plotted_implicit_functions[idx]:
+                if st.session_state.plotted_implicit_functions[idx]:
                     implicit_data = st.session_state.plotted_implicit_functions[idx]
                     try:
-                        x = np.linspace(xlower, xupper, 200) # Reduced points
-                        y = np.linspace(ylower, yupper, 200) # Reduced points
-                        X, Y = np.meshgrid(x, y)
-                        x_sym, y_sym = sp.symbols('x y')
-                        # Ensure 'lib' is available if needed in implicit func string
-                        expr = eval(implicit_data["function"], {"x": x_sym, "y": y_sym, "lib": sp, "np": np, "sp": sp}) 
-                        f = sp.lambdify((x_sym, y_sym), expr, modules=['numpy', {'ImmutableDenseMatrix': np.array}]) # Use numpy for lambdify
-                        Z = f(X, Y)
-                        temp_fig, temp_ax = plt.subplots()
-                        cs = temp_ax.contour(X, Y, Z, levels=[0])
-                        plt.close(temp_fig)
-                        if len(cs.allsegs[0]) > 0:
-                            x_points = np.concatenate([seg[:, 0] for seg in cs.allsegs[0]])
-                            y_points = np.concatenate([seg[:, 1] for seg in cs.allsegs[0]])
-                            upper_y = get_y_values_for_curve(x_fill, x_points, y_points, take_max=True)
+                        curve_points = (implicit_curves[idx] if idx in implicit_curves
+                                        else implicit_curve_points(implicit_data["function"], xlower, xupper, ylower, yupper))
+                        if curve_points is not None:
+                            x_points, y_points = curve_points
+                            upper_y = area_boundary(("Implicit", implicit_data["function"], "upper", area_window, x_start, x_end),
+                                                    lambda: get_y_values_for_curve(x_fill, x_points, y_points, take_max=True))
                         else: upper_y = np.full_like(x_fill, np.nan)
                     except Exception as e_impl: upper_y = np.full_like(x_fill, np.nan); st.error(f"Area {i+1} Implicit Upper Error: {e_impl}")
                 else: upper_y = np.full_like(x_fill, np.nan) # Function doesn't exist
             elif first_func_idx.startswith("Parametric"):
                 idx = int(first_func_idx.split()[1]) - 1
-                if idx < len(st.session_state.plotted_parametric_functions) and st.session_state.plotted_parametric_functions[idx]:
+                if st.session_state.plotted_parametric_functions[idx]:
                     param_data = st.session_state.plotted_parametric_functions[idx]
                     try:
-                         upper_y = get_y_values_for_curve(x_fill, param_data["x"], param_data["y"], take_max=True)
+                         upper_y = area_boundary(("Parametric", param_data["function"], param_data["zorder"], "upper", x_start, x_end),
+                                                 lambda: get_y_values_for_curve(x_fill, param_data["x_clean"], param_data["y_clean"], take_max=True))
                     except Exception as e_param: upper_y = np.full_like(x_fill, np.nan); st.error(f"Area {i+1} Parametric Upper Error: {e_param}")
                 else: upper_y = np.full_like(x_fill, np.nan) # Function doesn't exist
 
@@ -875,38 +857,31 @@ for i, area_data in enumerate(st.session_state.plotted_areas):
                 lower_y = np.zeros_like(x_fill)
             elif second_func_idx.startswith("Explicit"):
                 idx = int(second_func_idx.split()[1]) - 1
-                if idx < len(st.session_state.plotted_functions) and st.session_state.plotted_functions[idx]:
-                    lower_y = eval_function(st.session_state.plotted_functions[idx]["function"], x_fill, np, ylower, yupper)
+                if st.session_state.plotted_functions[idx]:
+                    lower_y = area_boundary(("Explicit", st.session_state.plotted_functions[idx]["function"], area_window, x_start, x_end),
+                                            lambda: eval_function(st.session_state.plotted_functions[idx]["function"], x_fill, np, ylower, yupper))
                 else: lower_y = np.full_like(x_fill, np.nan)
             elif second_func_idx.startswith("Implicit"):
                 idx = int(second_func_idx.split()[1]) - 1
-                if idx < len(st.session_state.plotted_implicit_functions) and st.session_state.plotted_implicit_functions[idx]:
+                if st.session_state.plotted_implicit_functions[idx]:
                     implicit_data = st.session_state.plotted_implicit_functions[idx]
                     try:
-                        x = np.linspace(xlower, xupper, 200) # Reduced points
-                        y = np.linspace(ylower, yupper, 200) # Reduced points
-                        X, Y = np.meshgrid(x, y)
-                        x_sym, y_sym = sp.symbols('x y')
-                        # Ensure 'lib' is available if needed in implicit func string
-                        expr = eval(implicit_data["function"], {"x": x_sym, "y": y_sym, "lib": sp, "np": np, "sp": sp}) 
-                        f = sp.lambdify((x_sym, y_sym), expr, modules=['numpy', {'ImmutableDenseMatrix': np.array}])
-                        Z = f(X, Y)
-                        temp_fig, temp_ax = plt.subplots()
-                        cs = temp_ax.contour(X, Y, Z, levels=[0])
-                        plt.close(temp_fig)
-                        if len(cs.allsegs[0]) > 0:
-                            x_points = np.concatenate([seg[:, 0] for seg in cs.allsegs[0]])
-                            y_points = np.concatenate([seg[:, 1] for seg in cs.allsegs[0]])
-                            lower_y = get_y_values_for_curve(x_fill, x_points, y_points, take_max=False) # take_max=False for lower
+                        curve_points = (implicit_curves[idx] if idx in implicit_curves
+                                        else implicit_curve_points(implicit_data["function"], xlower, xupper, ylower, yupper))
+                        if curve_points is not None:
+                            x_points, y_points = curve_points
+                            lower_y = area_boundary(("Implicit", implicit_data["function"], "lower", area_window, x_start, x_end),
+                                                    lambda: get_y_values_for_curve(x_fill, x_points, y_points, take_max=False)) # take_max=False for lower
                         else: lower_y = np.full_like(x_fill, np.nan)
                     except Exception as e_impl: lower_y = np.full_like(x_fill, np.nan); st.error(f"Area {i+1} Implicit Lower Error: {e_impl}")
                 else: lower_y = np.full_like(x_fill, np.nan)
             elif second_func_idx.startswith("Parametric"):
                  idx = int(second_func_idx.split()[1]) - 1
-                 if idx < len(st.session_state.plotted_parametric_functions) and st.session_state.plotted_parametric_functions[idx]:
+                 if st.session_state.plotted_parametric_functions[idx]:
                      param_data = st.session_state.plotted_parametric_functions[idx]
                      try:
-                          lower_y = get_y_values_for_curve(x_fill, param_data["x"], param_data["y"], take_max=False) # take_max=False for lower
+                          lower_y = area_boundary(("Parametric", param_data["function"], param_data["zorder"], "lower", x_start, x_end),
+                                                  lambda: get_y_values_for_curve(x_fill, param_data["x_clean"], param_data["y_clean"], take_max=False)) # take_max=False for lower
                      except Exception as e_param: lower_y = np.full_like(x_fill, np.nan); st.error(f"Area {i+1} Parametric Lower Error: {e_param}")
                  else: lower_y = np.full_like(x_fill, np.nan) # Function doesn't exist
 
@@ -915,20 +890,21 @@ for i, area_data in enumerate(st.session_state.plotted_areas):
             if upper_y is not None and lower_y is not None:
                 # Ensure y values are within plot limits (approx) - helps prevent weird fill artifacts
                 # Clip values slightly outside the user range to avoid issues near boundaries
-                upper_y = np.clip(upper_y, ylower - abs(0.1*ydifference), yupper + abs(0.1*ydifference))
-                lower_y = np.clip(lower_y, ylower - abs(0.1*ydifference), yupper + abs(0.1*ydifference))
+                # (boundaries may be shared with other areas, so clip into new arrays rather than in place)
+                clip_lower, clip_upper = ylower - abs(0.1*ydifference), yupper + abs(0.1*ydifference)
+                upper_y = np.clip(upper_y, clip_lower, clip_upper)
+                lower_y = np.clip(lower_y, clip_lower, clip_upper)
 
-                # Define where lower_y <= upper_y, considering NaNs
-                valid_fill_mask = (lower_y <= upper_y) & ~np.isnan(upper_y) & ~np.isnan(lower_y)
+                # Define where lower_y <= upper_y; comparisons with NaN are False, so NaNs drop out too
+                valid_fill_mask = np.less_equal(lower_y, upper_y)
 
                 if np.any(valid_fill_mask):
-                    ax.fill_between(x_fill[valid_fill_mask],
-                                  lower_y[valid_fill_mask],
-                                  upper_y[valid_fill_mask],
-                                  color=MY_COLORS[fill_color],
-                                  alpha=opacity,
-                                  zorder=zorder_value, # Use the new low zorder
-                                  linewidth=0.0) # No edge line for fill
+                    # Same outline fill_between builds: along the upper curve, back along the lower
+                    x_valid = x_fill[valid_fill_mask]
+                    area_polygons.append(np.concatenate([
+                        np.column_stack((x_valid, upper_y[valid_fill_mask])),
+                        np.column_stack((x_valid[::-1], lower_y[valid_fill_mask][::-1]))]))
+                    area_facecolors.append(to_rgba(MY_COLORS[fill_color], opacity))
                 elif np.any(~np.isnan(upper_y)) and np.any(~np.isnan(lower_y)): # Check if functions existed but didn't overlap correctly
                      st.warning(f"Area {i+1}: Inner function is above outer function in the specified range.")
 
@@ -938,6 +914,15 @@ for i, area_data in enumerate(st.session_state.plotted_areas):
         except Exception as e:
             st.error(f"Error processing Area {i+1}: {str(e)}")
 # --- End of Area plotting loop ---
+st.session_state.area_boundary_memo = area_boundaries  # Only boundaries still in use are kept
+
+if area_polygons:
+    # Low zorder keeps every area beneath functions and points; later areas draw on top
+    ax.add_collection(PolyCollection(area_polygons,
+                                     facecolors=area_facecolors,
+                                     linewidths=0.0, # No edge line for fill
+                                     zorder=1.0),
+                      autolim=False)
 
 # --- Add loop for plotting BINOMIAL distributions ---
 for i, binom_data in enumerate(st.session_state.plotted_binomials):
@@ -951,11 +936,8 @@ for i, binom_data in enumerate(st.session_state.plotted_binomials):
         zorder_value = 1.5 + i * 0.01 # e.g., 1.50, 1.51, 1.52
 
         try:
-            # Define range of outcomes k
-            k_values = np.arange(0, n + 1)
-
-            # Calculate PMF using scipy.stats.binom
-            pmf_values = binom.pmf(k_values, n, p)
+            # PMF over outcomes k = 0..n (cached per (n, p))
+            k_values, pmf_values = binom_pmf(n, p)
 
             # Plot as a bar chart - alpha parameter is now removed
             ax.bar(k_values,
@@ -975,15 +957,45 @@ if not white_background:
     ax.set_facecolor('none')  # Transparent background
     fig.patch.set_facecolor('none')  # Transparent figure background
 
-plot_placeholder.pyplot(fig)
+
+#-------SHOW FIGURE-------------------------
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def render_preview(figure_state, _fig):
+    """On-screen PNG, rendered the way st.pyplot does. Cached on the same key as
+    the exports, so reruns that leave the graph unchanged reuse the image."""
+    preview_buffer = io.BytesIO()
+    _fig.savefig(preview_buffer, format="png", dpi=200, bbox_inches="tight")
+    return preview_buffer.getvalue()
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def render_exports(figure_state, png_dpi, _fig):
+    """SVG, gzipped SVG and PNG bytes for the current figure. Keyed on everything
+    the figure is drawn from, so reruns that leave the graph unchanged skip re-rendering."""
+    svg_buffer = io.StringIO()
+    _fig.savefig(svg_buffer, format="svg")
+    svg_data = svg_buffer.getvalue()
+    svg_buffer.close()
+    return svg_data, gzip.compress(svg_data.encode("utf-8")), figure_to_png(_fig, dpi=png_dpi)
+
+
+figure_state = (
+    graph_settings,
+    axis_weight,
+    st.session_state.plotted_functions,
+    st.session_state.plotted_points,
+    st.session_state.plotted_implicit_functions,
+    st.session_state.plotted_parametric_functions,
+    st.session_state.plotted_areas,
+    st.session_state.plotted_binomials,
+)
+plot_placeholder.image(render_preview(figure_state, fig), width="stretch")
 
 
 #-------SAVE IMAGES-------------------------
 
-svg_buffer = io.StringIO()
-fig.savefig(svg_buffer, format="svg")
-svg_data = svg_buffer.getvalue()
-svg_buffer.close()
+svg_data, svgz_data, png_data = render_exports(figure_state, png_dpi, fig)
 
 svg_placeholder.download_button(
     label="Download SVG",
@@ -992,18 +1004,19 @@ svg_placeholder.download_button(
     mime="image/svg+xml",
 )
 
-png_buffer = io.BytesIO()
-fig.savefig(png_buffer, format="png", dpi=300, bbox_inches="tight", pad_inches=0)
-png_buffer.seek(0)
-png_data = png_buffer.getvalue()
-png_buffer.close()
-
 png_placeholder.download_button(
     label = "Download PNG", 
     data=png_data, 
     file_name="figure1.png", 
     mime="image/png")
 
+svgz_placeholder.download_button(
+    label="Download SVGZ",
+    data=svgz_data,
+    file_name="figure1.svgz",
+    mime="image/svg+xml",
+)
+
 
 #-------unused-------
 
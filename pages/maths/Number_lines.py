@@ -5,12 +5,15 @@ Creates educational number line diagrams with points, intervals, and labels.
 
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import to_rgba
 import streamlit as st
 
 from shared_utils import (
     MY_COLORS,
     get_color_options,
-    create_download_buttons,
+    export_figure,
+    show_download_buttons,
     apply_figure_style,
     init_session_state,
     DEFAULT_WHITE_BG
@@ -20,10 +23,11 @@ from number_line_utils import (
     draw_tick_marks,
     draw_minor_ticks,
     draw_tick_labels,
-    draw_point,
+    select_label_ticks,
+    draw_points,
     draw_point_label,
-    draw_interval,
-    draw_interval_fill,
+    draw_intervals,
+    draw_interval_fills,
     auto_set_limits
 )
 
@@ -49,28 +53,53 @@ NL_DEFAULTS = {
     "nl_label_format": "auto",
     "nl_show_minor": False,
     "nl_minor_div": 2,
+    # Points and intervals shown in the control tabs
+    "nl_point_count": 1,
+    "nl_interval_count": 1,
 }
+
+# Session state keys for each point and interval slot, built once
+PT_KEYS = tuple(
+    {"show": f"nl_show_pt_{i}", "val": f"nl_pt_val_{i}", "style": f"nl_pt_style_{i}",
+     "color": f"nl_pt_color_{i}", "label": f"nl_pt_label_{i}", "pos": f"nl_pt_label_pos_{i}"}
+    for i in range(5)
+)
+INT_KEYS = tuple(
+    {"show": f"nl_show_int_{i}", "start": f"nl_int_start_{i}", "end": f"nl_int_end_{i}",
+     "color": f"nl_int_color_{i}", "start_style": f"nl_int_start_style_{i}",
+     "end_style": f"nl_int_end_style_{i}", "fill": f"nl_int_fill_{i}"}
+    for i in range(3)
+)
+
 # Add point defaults
-for i in range(5):
-    NL_DEFAULTS[f"nl_show_pt_{i}"] = False
-    NL_DEFAULTS[f"nl_pt_val_{i}"] = float(i)
-    NL_DEFAULTS[f"nl_pt_style_{i}"] = "filled"
-    NL_DEFAULTS[f"nl_pt_color_{i}"] = "blue"
-    NL_DEFAULTS[f"nl_pt_label_{i}"] = ""
-    NL_DEFAULTS[f"nl_pt_label_pos_{i}"] = "above"
+for i, k in enumerate(PT_KEYS):
+    NL_DEFAULTS[k["show"]] = False
+    NL_DEFAULTS[k["val"]] = float(i)
+    NL_DEFAULTS[k["style"]] = "filled"
+    NL_DEFAULTS[k["color"]] = "blue"
+    NL_DEFAULTS[k["label"]] = ""
+    NL_DEFAULTS[k["pos"]] = "above"
 # Add interval defaults
-for i in range(3):
-    NL_DEFAULTS[f"nl_show_int_{i}"] = False
-    NL_DEFAULTS[f"nl_int_start_{i}"] = -2.0 + i
-    NL_DEFAULTS[f"nl_int_end_{i}"] = 2.0 + i
-    NL_DEFAULTS[f"nl_int_color_{i}"] = "blue"
-    NL_DEFAULTS[f"nl_int_start_style_{i}"] = "closed"
-    NL_DEFAULTS[f"nl_int_end_style_{i}"] = "closed"
-    NL_DEFAULTS[f"nl_int_fill_{i}"] = True
+for i, k in enumerate(INT_KEYS):
+    NL_DEFAULTS[k["show"]] = False
+    NL_DEFAULTS[k["start"]] = -2.0 + i
+    NL_DEFAULTS[k["end"]] = 2.0 + i
+    NL_DEFAULTS[k["color"]] = "blue"
+    NL_DEFAULTS[k["start_style"]] = "closed"
+    NL_DEFAULTS[k["end_style"]] = "closed"
+    NL_DEFAULTS[k["fill"]] = True
 
 init_session_state(NL_DEFAULTS)
 
 
+def remove_slot(count_key, slot_keys):
+    """Drop the last point or interval slot and untick its Show box, so it
+    comes back hidden if added again. Runs as a button callback because the
+    checkbox has already been created by the time the button reports a click."""
+    st.session_state[count_key] -= 1
+    st.session_state[slot_keys[st.session_state[count_key]]["show"]] = False
+
+
 # Helper to get selectbox index from session state value
 def get_index(options, key):
     """Get the index of the current session state value in options list."""
@@ -85,7 +114,8 @@ COLOR_OPTIONS = get_color_options()
 
 
 # --- Sidebar: Appearance Settings ---
-with st.sidebar:
+# Grouped in a form so dragging a slider only reruns the page on Apply
+with st.sidebar.form("nl_appearance", border=False):
     st.header("Appearance")
     
     axis_weight = st.slider(
@@ -102,11 +132,25 @@ with st.sidebar:
     
     st.write("")
     white_background = st.toggle("White background", key="nl_white_bg")
+    
+    st.form_submit_button("Apply")
 
 
 # Fixed figure size
 fig_width = 12
 fig_height = 3
+# The preview only fills the plot column; downloads are rendered at full resolution
+preview_dpi = 100
+# Wide ranges label only round multiples of the step so at most this many labels are drawn
+max_tick_labels = 30
+
+# Straight-line geometry only, so paths can be simplified freely
+number_line_rc = {
+    "path.simplify": True,
+    "path.simplify_threshold": 1.0,
+    "path.snap": False,
+    "agg.path.chunksize": 10000,
+}
 
 
 # --- Main Layout ---
@@ -144,9 +188,9 @@ with col_controls:
             max_val = st.number_input("Maximum", step=1.0, key="nl_max")
         
         # Validate range
-        if min_val >= max_val:
+        range_valid = min_val < max_val
+        if not range_valid:
             st.error("Minimum must be less than maximum")
-            max_val = min_val + 1
         
         st.write("")
         show_arrows = st.checkbox("Show arrows at endpoints", key="nl_arrows")
@@ -197,49 +241,62 @@ with col_controls:
     # === POINTS TAB ===
     with tab_points:
         st.caption("Points on number line (up to 5)")
-        for i in range(5):
+        for i in range(st.session_state.nl_point_count):
+            k = PT_KEYS[i]
             with st.expander(f"Point {i+1}", expanded=(i == 0)):
                 p_cols = st.columns([1, 2, 1, 1])
                 with p_cols[0]:
-                    show_pt = st.checkbox("Show", key=f"nl_show_pt_{i}")
+                    show_pt = st.checkbox("Show", key=k["show"])
                 with p_cols[1]:
-                    pt_value = st.number_input("Value", step=0.5, key=f"nl_pt_val_{i}")
+                    pt_value = st.number_input("Value", step=0.5, key=k["val"])
                 with p_cols[2]:
                     pt_style_opts = ["filled", "open"]
                     pt_style = st.selectbox("Style", pt_style_opts,
-                                           index=get_index(pt_style_opts, f"nl_pt_style_{i}"), 
-                                           key=f"nl_pt_style_{i}")
+                                           index=get_index(pt_style_opts, k["style"]), 
+                                           key=k["style"])
                 with p_cols[3]:
                     pt_color = st.selectbox("Color", options=COLOR_OPTIONS,
-                                           index=get_index(COLOR_OPTIONS, f"nl_pt_color_{i}"),
-                                           key=f"nl_pt_color_{i}")
+                                           index=get_index(COLOR_OPTIONS, k["color"]),
+                                           key=k["color"])
                 
                 if show_pt:
                     pt_label_cols = st.columns([2, 1])
                     with pt_label_cols[0]:
-                        pt_label = st.text_input("Label", key=f"nl_pt_label_{i}", placeholder="e.g. $a$")
+                        pt_label = st.text_input("Label", key=k["label"], placeholder="e.g. $a$")
                     with pt_label_cols[1]:
                         label_pos_opts = ["above", "below"]
                         pt_label_pos = st.selectbox("Position", label_pos_opts,
-                                                   index=get_index(label_pos_opts, f"nl_pt_label_pos_{i}"),
-                                                   key=f"nl_pt_label_pos_{i}")
+                                                   index=get_index(label_pos_opts, k["pos"]),
+                                                   key=k["pos"])
+        
+        pt_btn_cols = st.columns(2)
+        with pt_btn_cols[0]:
+            if st.session_state.nl_point_count < 5:
+                if st.button("+ Add point", key="nl_add_point"):
+                    st.session_state.nl_point_count += 1
+                    st.rerun()
+        with pt_btn_cols[1]:
+            if st.session_state.nl_point_count > 1:
+                st.button("− Remove point", key="nl_remove_point", on_click=remove_slot,
+                          args=("nl_point_count", PT_KEYS))
     
     # === INTERVALS TAB ===
     with tab_intervals:
         st.caption("Intervals (up to 3)")
-        for i in range(3):
+        for i in range(st.session_state.nl_interval_count):
+            k = INT_KEYS[i]
             with st.expander(f"Interval {i+1}", expanded=(i == 0)):
                 int_cols = st.columns([1, 1, 1, 1])
                 with int_cols[0]:
-                    show_int = st.checkbox("Show", key=f"nl_show_int_{i}")
+                    show_int = st.checkbox("Show", key=k["show"])
                 with int_cols[1]:
-                    int_start = st.number_input("Start", step=0.5, key=f"nl_int_start_{i}")
+                    int_start = st.number_input("Start", step=0.5, key=k["start"])
                 with int_cols[2]:
-                    int_end = st.number_input("End", step=0.5, key=f"nl_int_end_{i}")
+                    int_end = st.number_input("End", step=0.5, key=k["end"])
                 with int_cols[3]:
                     int_color = st.selectbox("Color", options=COLOR_OPTIONS,
-                                            index=get_index(COLOR_OPTIONS, f"nl_int_color_{i}"),
-                                            key=f"nl_int_color_{i}")
+                                            index=get_index(COLOR_OPTIONS, k["color"]),
+                                            key=k["color"])
                 
                 if show_int:
                     int_cols2 = st.columns([1, 1, 1])
@@ -247,31 +304,56 @@ with col_controls:
                     with int_cols2[0]:
                         int_start_style = st.selectbox(
                             "Start", endpoint_opts,
-                            index=get_index(endpoint_opts, f"nl_int_start_style_{i}"),
-                            key=f"nl_int_start_style_{i}",
+                            index=get_index(endpoint_opts, k["start_style"]),
+                            key=k["start_style"],
                             help="closed = [, open = (, arrow = extends to -∞"
                         )
                     with int_cols2[1]:
                         int_end_style = st.selectbox(
                             "End", endpoint_opts,
-                            index=get_index(endpoint_opts, f"nl_int_end_style_{i}"),
-                            key=f"nl_int_end_style_{i}",
+                            index=get_index(endpoint_opts, k["end_style"]),
+                            key=k["end_style"],
                             help="closed = ], open = ), arrow = extends to +∞"
                         )
                     with int_cols2[2]:
-                        int_fill = st.checkbox("Fill", key=f"nl_int_fill_{i}")
+                        int_fill = st.checkbox("Fill", key=k["fill"])
+        
+        int_btn_cols = st.columns(2)
+        with int_btn_cols[0]:
+            if st.session_state.nl_interval_count < 3:
+                if st.button("+ Add interval", key="nl_add_interval"):
+                    st.session_state.nl_interval_count += 1
+                    st.rerun()
+        with int_btn_cols[1]:
+            if st.session_state.nl_interval_count > 1:
+                st.button("− Remove interval", key="nl_remove_interval", on_click=remove_slot,
+                          args=("nl_interval_count", INT_KEYS))
         
         st.caption("Use 'closed' for [ or ], 'open' for ( or ), 'arrow' for infinite extent.")
 
 
 # --- Render Number Line ---
-def render_number_line():
-    """Render the number line with all configured options."""
+def draw_number_line_figure(min_val, max_val, axis_weight, label_size, white_background,
+                            nl_color, show_arrows, show_ticks, major_step, tick_length,
+                            show_labels, label_format, show_minor, minor_divisions,
+                            points, intervals):
+    """
+    Draw the number line with all configured options.
+    
+    Every input is passed in explicitly so the figure depends only on the
+    plot spec, which is what the preview and export caches key on.
+    
+    Returns:
+        Matplotlib figure
+    """
     
     # Create figure
     fig, ax = plt.subplots(figsize=(fig_width, fig_height))
     ax.set_aspect('auto')
     ax.axis('off')
+    # Fixed margins instead of a tight_layout solve on every render; the bottom
+    # margin grows with the label size to leave room for tick labels
+    fig.subplots_adjust(left=0.02, right=0.98, top=0.9, bottom=0.05 + label_size / 400)
     
     # Set limits
     auto_set_limits(ax, min_val, max_val)
@@ -280,24 +362,30 @@ def render_number_line():
     apply_figure_style(fig, ax, white_background)
     
     line_width = axis_weight * 1.3
-    line_style_map = {"solid": "-", "dashed": "--"}
+    
+    # Resolve colors to RGBA once
+    line_color = to_rgba(MY_COLORS[nl_color])
+    point_colors = [to_rgba(MY_COLORS[p_color]) for _, _, p_color, _, _ in points]
+    
+    # Split intervals into fills and strokes in a single pass
+    interval_fills = []
+    interval_strokes = []
+    for i_start, i_end, i_color, i_fill, i_start_style, i_end_style in intervals:
+        color = to_rgba(MY_COLORS[i_color])
+        if i_fill:
+            interval_fills.append((i_start, i_end, color))
+        interval_strokes.append((i_start, i_end, color, i_start_style, i_end_style))
     
     # --- Draw interval fills first (behind everything) ---
-    for i in range(3):
-        if st.session_state.get(f"nl_show_int_{i}", False):
-            i_start = st.session_state.get(f"nl_int_start_{i}", -2)
-            i_end = st.session_state.get(f"nl_int_end_{i}", 2)
-            i_color = st.session_state.get(f"nl_int_color_{i}", "blue")
-            i_fill = st.session_state.get(f"nl_int_fill_{i}", True)
-            
-            if i_fill:
-                draw_interval_fill(ax, i_start, i_end, 
-                                  color=MY_COLORS[i_color], alpha=0.2, zorder=2)
+    draw_interval_fills(
+        ax, interval_fills,
+        alpha=0.2, zorder=2
+    )
     
     # --- Draw main number line ---
     draw_number_line(
         ax, min_val, max_val,
-        color=MY_COLORS[nl_color],
+        color=line_color,
         line_width=line_width,
         show_arrows=show_arrows,
         zorder=10
@@ -308,7 +396,7 @@ def render_number_line():
     if show_ticks:
         ticks = draw_tick_marks(
             ax, min_val, max_val, major_step,
-            color=MY_COLORS[nl_color],
+            color=line_color,
             line_width=line_width,
             tick_length=tick_length,
             zorder=15
@@ -318,7 +406,7 @@ def render_number_line():
         if show_minor:
             draw_minor_ticks(
                 ax, min_val, max_val, major_step, minor_divisions,
-                color=MY_COLORS[nl_color],
+                color=line_color,
                 line_width=line_width * 0.7,
                 tick_length=tick_length * 0.5,
                 zorder=14
@@ -327,8 +415,8 @@ def render_number_line():
         # Labels
         if show_labels:
             draw_tick_labels(
-                ax, ticks,
-                color=MY_COLORS[nl_color],
+                ax, select_label_ticks(ticks, major_step, max_tick_labels),
+                color=line_color,
                 font_size=label_size,
                 format_type=label_format,
                 offset=tick_length + 0.2,
@@ -337,68 +425,103 @@ def render_number_line():
             )
     
     # --- Draw intervals ---
-    for i in range(3):
-        if st.session_state.get(f"nl_show_int_{i}", False):
-            i_start = st.session_state.get(f"nl_int_start_{i}", -2)
-            i_end = st.session_state.get(f"nl_int_end_{i}", 2)
-            i_color = st.session_state.get(f"nl_int_color_{i}", "blue")
-            i_start_style = st.session_state.get(f"nl_int_start_style_{i}", "closed")
-            i_end_style = st.session_state.get(f"nl_int_end_style_{i}", "closed")
-            
-            draw_interval(
-                ax, i_start, i_end,
-                color=MY_COLORS[i_color],
-                line_width=line_width,
-                start_style=i_start_style,
-                end_style=i_end_style,
-                interval_offset=0.2,
-                zorder=20
-            )
+    draw_intervals(
+        ax, interval_strokes,
+        line_width=line_width,
+        interval_offset=0.2,
+        zorder=20
+    )
     
     # --- Draw points ---
-    for i in range(5):
-        if st.session_state.get(f"nl_show_pt_{i}", False):
-            p_val = st.session_state.get(f"nl_pt_val_{i}", 0)
-            p_style = st.session_state.get(f"nl_pt_style_{i}", "filled")
-            p_color = st.session_state.get(f"nl_pt_color_{i}", "blue")
-            p_label = st.session_state.get(f"nl_pt_label_{i}", "")
-            p_label_pos = st.session_state.get(f"nl_pt_label_pos_{i}", "above")
-            
-            draw_point(
-                ax, p_val,
-                color=MY_COLORS[p_color],
-                marker_size=axis_weight * 4,
-                marker_style=p_style,
-                zorder=25
+    if points:
+        draw_points(
+            ax,
+            [p_val for p_val, _, _, _, _ in points],
+            point_colors,
+            marker_size=axis_weight * 4,
+            marker_styles=[p_style for _, p_style, _, _, _ in points],
+            zorder=25
+        )
+    
+    # --- Draw point labels ---
+    for (p_val, _, _, p_label, p_label_pos), p_color in zip(points, point_colors):
+        if p_label:
+            draw_point_label(
+                ax, p_val, p_label,
+                color=p_color,
+                font_size=label_size,
+                offset=0.4,
+                direction=p_label_pos,
+                white_background=white_background,
+                zorder=100
             )
-            
-            if p_label:
-                draw_point_label(
-                    ax, p_val, p_label,
-                    color=MY_COLORS[p_color],
-                    font_size=label_size,
-                    offset=0.4,
-                    direction=p_label_pos,
-                    white_background=white_background,
-                    zorder=100
-                )
     
-    fig.tight_layout()
     return fig
 
 
+@st.cache_data(show_spinner=False, max_entries=32)
+def render_number_line(spec):
+    """
+    Preview image for a plot spec, read straight from the Agg canvas.
+    Cached so reruns that leave the diagram unchanged reuse it.
+    """
+    with plt.rc_context(number_line_rc):
+        fig = draw_number_line_figure(*spec)
+        fig.set_dpi(preview_dpi)
+        canvas = FigureCanvasAgg(fig)
+        canvas.draw()
+        preview = np.asarray(canvas.buffer_rgba()).copy()
+    plt.close(fig)
+    return preview
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def export_number_line(spec):
+    """SVG and PNG download bytes for a plot spec, built when a download is clicked."""
+    with plt.rc_context(number_line_rc):
+        fig = draw_number_line_figure(*spec)
+        svg_data, png_data = export_figure(fig)
+    plt.close(fig)
+    return svg_data, png_data
+
+
 # --- Main Rendering Logic ---
-fig = render_number_line()
+# One snapshot of session state for all point and interval lookups
+state = st.session_state.to_dict()
+points = tuple(
+    (state[k["val"]], state[k["style"]], state[k["color"]], state[k["label"]], state[k["pos"]])
+    for k in PT_KEYS[:state["nl_point_count"]] if state[k["show"]]
+)
+intervals = tuple(
+    (state[k["start"]], state[k["end"]], state[k["color"]], state[k["fill"]],
+     state[k["start_style"]], state[k["end_style"]])
+    for k in INT_KEYS[:state["nl_interval_count"]] if state[k["show"]]
+)
 
-# Display
-plot_placeholder.pyplot(fig)
+spec = (
+    min_val, max_val, axis_weight, label_size, white_background,
+    nl_color, show_arrows,
+    show_ticks,
+    major_step if show_ticks else None,
+    tick_length if show_ticks else None,
+    show_ticks and show_labels,
+    label_format if show_ticks and show_labels else None,
+    show_ticks and show_minor,
+    minor_divisions if show_ticks and show_minor else None,
+    points, intervals
+)
 
-# Download buttons
-create_download_buttons(fig, svg_placeholder, png_placeholder, "number_line")
+# Display, skipping the render entirely while the range is invalid
+if range_valid:
+    plot_placeholder.image(render_number_line(spec), width="stretch")
+    
+    # Download buttons, rendered only when clicked
+    show_download_buttons(lambda: export_number_line(spec)[0], lambda: export_number_line(spec)[1],
+                          svg_placeholder, png_placeholder, "number_line")
+else:
+    plot_placeholder.info("Adjust the range to render the number line.")
 
 # Show info at bottom of controls
 with col_controls:
     range_size = max_val - min_val
     st.caption(f"**Range:** {min_val} to {max_val} · **Size:** {range_size}")
-
-plt.close(fig)
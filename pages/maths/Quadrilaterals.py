@@ -3,6 +3,7 @@ Quadrilateral Diagrams Page
 Creates educational quadrilateral diagrams with labeled vertices, sides, angles, and markers.
 """
 
+import io
 import numpy as np
 import matplotlib.pyplot as plt
 import streamlit as st
@@ -10,14 +11,16 @@ import streamlit as st
 from shared_utils import (
     MY_COLORS,
     get_color_options,
-    create_download_buttons,
+    export_figure,
+    show_download_buttons,
     apply_figure_style,
     init_session_state,
     DEFAULT_WHITE_BG
 )
 from quadrilateral_utils import (
-    get_quadrilateral_vertices_from_coordinates,
     get_centroid,
+    get_side_vectors,
+    get_outward_signs,
     get_square,
     get_rectangle,
     get_parallelogram,
@@ -28,8 +31,7 @@ from quadrilateral_utils import (
     draw_quadrilateral,
     draw_vertex_label,
     draw_side_label,
-    draw_angle_arc,
-    draw_right_angle_marker,
+    draw_angle_markers,
     draw_angle_label,
     draw_tick_marks,
     draw_parallel_marks,
@@ -123,6 +125,10 @@ for i in range(4):
     QUAD_DEFAULTS[f"quad_slabel_dist_{i}"] = 0.4
 
 init_session_state(QUAD_DEFAULTS)
+# Closed tabs (say Diagonals while Angles is open) create no widgets this run,
+# so write every key back to stop Streamlit clearing their settings
+for key in QUAD_DEFAULTS:
+    st.session_state[key] = st.session_state[key]
 
 
 # Helper to get selectbox index
@@ -138,7 +144,9 @@ COLOR_OPTIONS = get_color_options()
 
 
 # --- Sidebar: Appearance Settings ---
-with st.sidebar:
+# Line weight, label size and padding restyle the whole quadrilateral, so they
+# wait for Apply rather than redrawing at every slider step
+with st.sidebar.form("quad_appearance", border=False):
     st.header("Appearance")
     
     axis_weight = st.slider(
@@ -161,12 +169,16 @@ with st.sidebar:
     
     st.write("")
     white_background = st.toggle("White background", key="quad_white_bg")
+    
+    st.form_submit_button("Apply")
 
 
 # Fixed figure size
 fig_height = 8
 fig_width = 8
 
+LINE_STYLE_MAP = {"solid": "-", "dashed": "--", "dotted": ":"}
+
 
 # --- Main Layout ---
 col_plot, col_controls = st.columns([1.5, 1])
@@ -193,322 +205,313 @@ with col_controls:
         "Angles",
         "Marks",
         "Diagonals"
-    ])
+    ], key="quad_tab", on_change="rerun")
     
     # === DEFINITION TAB ===
     with tab_def:
-        input_method = st.radio(
-            "Define quadrilateral by:",
-            ["Preset shapes", "Coordinates"],
-            horizontal=True,
-            key="quad_input_method"
-        )
-        
-        st.write("")
-        
-        if input_method == "Preset shapes":
-            preset_opts = ["Square", "Rectangle", "Parallelogram", "Rhombus", 
-                          "Trapezium", "Isosceles trapezium", "Kite"]
-            preset_cols = st.columns([2, 1])
-            with preset_cols[0]:
-                preset_type = st.selectbox(
-                    "Shape type", preset_opts,
-                    index=get_index(preset_opts, "quad_preset_type"),
-                    key="quad_preset_type"
-                )
-            with preset_cols[1]:
-                preset_rotation = st.number_input("Rotation (°)", step=15.0, key="quad_preset_rotation")
+        if tab_def.open:
+            input_method = st.radio(
+                "Define quadrilateral by:",
+                ["Preset shapes", "Coordinates"],
+                horizontal=True,
+                key="quad_input_method"
+            )
             
             st.write("")
             
-            if preset_type == "Square":
-                square_side = st.number_input("Side length", min_value=0.1, step=0.5, key="quad_square_side")
-            
-            elif preset_type == "Rectangle":
-                rect_cols = st.columns(2)
-                with rect_cols[0]:
-                    rect_width = st.number_input("Width", min_value=0.1, step=0.5, key="quad_rect_width")
-                with rect_cols[1]:
-                    rect_height = st.number_input("Height", min_value=0.1, step=0.5, key="quad_rect_height")
-            
-            elif preset_type == "Parallelogram":
-                para_cols = st.columns(3)
-                with para_cols[0]:
-                    para_base = st.number_input("Base", min_value=0.1, step=0.5, key="quad_para_base")
-                with para_cols[1]:
-                    para_side = st.number_input("Side", min_value=0.1, step=0.5, key="quad_para_side")
-                with para_cols[2]:
-                    para_angle = st.number_input("Angle (°)", min_value=1.0, max_value=179.0, step=5.0, key="quad_para_angle")
-            
-            elif preset_type == "Rhombus":
-                rhombus_cols = st.columns(2)
-                with rhombus_cols[0]:
-                    rhombus_side = st.number_input("Side", min_value=0.1, step=0.5, key="quad_rhombus_side")
-                with rhombus_cols[1]:
-                    rhombus_angle = st.number_input("Angle (°)", min_value=1.0, max_value=179.0, step=5.0, key="quad_rhombus_angle")
-            
-            elif preset_type == "Trapezium":
-                trap_cols = st.columns(2)
-                with trap_cols[0]:
-                    trap_top = st.number_input("Top (parallel)", min_value=0.1, step=0.5, key="quad_trap_top")
-                    trap_height = st.number_input("Height", min_value=0.1, step=0.5, key="quad_trap_height")
-                with trap_cols[1]:
-                    trap_bottom = st.number_input("Bottom (parallel)", min_value=0.1, step=0.5, key="quad_trap_bottom")
-                    trap_offset = st.number_input("Top offset", step=0.5, key="quad_trap_offset", 
-                                                  help="Horizontal shift of top side")
-            
-            elif preset_type == "Isosceles trapezium":
-                iso_trap_cols = st.columns(3)
-                with iso_trap_cols[0]:
-                    trap_top = st.number_input("Top", min_value=0.1, step=0.5, key="quad_trap_top")
-                with iso_trap_cols[1]:
-                    trap_bottom = st.number_input("Bottom", min_value=0.1, step=0.5, key="quad_trap_bottom")
-                with iso_trap_cols[2]:
-                    trap_height = st.number_input("Height", min_value=0.1, step=0.5, key="quad_trap_height")
+            if input_method == "Preset shapes":
+                preset_opts = ["Square", "Rectangle", "Parallelogram", "Rhombus", 
+                              "Trapezium", "Isosceles trapezium", "Kite"]
+                preset_cols = st.columns([2, 1])
+                with preset_cols[0]:
+                    preset_type = st.selectbox(
+                        "Shape type", preset_opts,
+                        index=get_index(preset_opts, "quad_preset_type"),
+                        key="quad_preset_type"
+                    )
+                with preset_cols[1]:
+                    preset_rotation = st.number_input("Rotation (°)", step=15.0, key="quad_preset_rotation")
+                
+                st.write("")
+                
+                if preset_type == "Square":
+                    square_side = st.number_input("Side length", min_value=0.1, step=0.5, key="quad_square_side")
+                
+                elif preset_type == "Rectangle":
+                    rect_cols = st.columns(2)
+                    with rect_cols[0]:
+                        rect_width = st.number_input("Width", min_value=0.1, step=0.5, key="quad_rect_width")
+                    with rect_cols[1]:
+                        rect_height = st.number_input("Height", min_value=0.1, step=0.5, key="quad_rect_height")
+                
+                elif preset_type == "Parallelogram":
+                    para_cols = st.columns(3)
+                    with para_cols[0]:
+                        para_base = st.number_input("Base", min_value=0.1, step=0.5, key="quad_para_base")
+                    with para_cols[1]:
+                        para_side = st.number_input("Side", min_value=0.1, step=0.5, key="quad_para_side")
+                    with para_cols[2]:
+                        para_angle = st.number_input("Angle (°)", min_value=1.0, max_value=179.0, step=5.0, key="quad_para_angle")
+                
+                elif preset_type == "Rhombus":
+                    rhombus_cols = st.columns(2)
+                    with rhombus_cols[0]:
+                        rhombus_side = st.number_input("Side", min_value=0.1, step=0.5, key="quad_rhombus_side")
+                    with rhombus_cols[1]:
+                        rhombus_angle = st.number_input("Angle (°)", min_value=1.0, max_value=179.0, step=5.0, key="quad_rhombus_angle")
+                
+                elif preset_type == "Trapezium":
+                    trap_cols = st.columns(2)
+                    with trap_cols[0]:
+                        trap_top = st.number_input("Top (parallel)", min_value=0.1, step=0.5, key="quad_trap_top")
+                        trap_height = st.number_input("Height", min_value=0.1, step=0.5, key="quad_trap_height")
+                    with trap_cols[1]:
+                        trap_bottom = st.number_input("Bottom (parallel)", min_value=0.1, step=0.5, key="quad_trap_bottom")
+                        trap_offset = st.number_input("Top offset", step=0.5, key="quad_trap_offset", 
+                                                      help="Horizontal shift of top side")
+                
+                elif preset_type == "Isosceles trapezium":
+                    iso_trap_cols = st.columns(3)
+                    with iso_trap_cols[0]:
+                        trap_top = st.number_input("Top", min_value=0.1, step=0.5, key="quad_trap_top")
+                    with iso_trap_cols[1]:
+                        trap_bottom = st.number_input("Bottom", min_value=0.1, step=0.5, key="quad_trap_bottom")
+                    with iso_trap_cols[2]:
+                        trap_height = st.number_input("Height", min_value=0.1, step=0.5, key="quad_trap_height")
+                
+                elif preset_type == "Kite":
+                    kite_cols = st.columns(3)
+                    with kite_cols[0]:
+                        kite_d1 = st.number_input("Width", min_value=0.1, step=0.5, key="quad_kite_d1",
+                                                 help="Horizontal diagonal")
+                    with kite_cols[1]:
+                        kite_d2 = st.number_input("Height", min_value=0.1, step=0.5, key="quad_kite_d2",
+                                                 help="Vertical diagonal")
+                    with kite_cols[2]:
+                        kite_split = st.slider("Split", min_value=0.1, max_value=0.9, step=0.1, key="quad_kite_split",
+                                              help="Where diagonals cross")
             
-            elif preset_type == "Kite":
-                kite_cols = st.columns(3)
-                with kite_cols[0]:
-                    kite_d1 = st.number_input("Width", min_value=0.1, step=0.5, key="quad_kite_d1",
-                                             help="Horizontal diagonal")
-                with kite_cols[1]:
-                    kite_d2 = st.number_input("Height", min_value=0.1, step=0.5, key="quad_kite_d2",
-                                             help="Vertical diagonal")
-                with kite_cols[2]:
-                    kite_split = st.slider("Split", min_value=0.1, max_value=0.9, step=0.1, key="quad_kite_split",
-                                          help="Where diagonals cross")
-        
-        else:  # Coordinates
-            coord_cols = st.columns(2)
-            with coord_cols[0]:
-                st.caption("Vertex A")
-                ax_coord = st.number_input("$x_A$", step=0.5, key="quad_ax")
-                ay_coord = st.number_input("$y_A$", step=0.5, key="quad_ay")
-                st.caption("Vertex C")
-                cx_coord = st.number_input("$x_C$", step=0.5, key="quad_cx")
-                cy_coord = st.number_input("$y_C$", step=0.5, key="quad_cy")
-            with coord_cols[1]:
-                st.caption("Vertex B")
-                bx_coord = st.number_input("$x_B$", step=0.5, key="quad_bx")
-                by_coord = st.number_input("$y_B$", step=0.5, key="quad_by")
-                st.caption("Vertex D")
-                dx_coord = st.number_input("$x_D$", step=0.5, key="quad_dx")
-                dy_coord = st.number_input("$y_D$", step=0.5, key="quad_dy")
+            else:  # Coordinates
+                coord_cols = st.columns(2)
+                with coord_cols[0]:
+                    st.caption("Vertex A")
+                    ax_coord = st.number_input("$x_A$", step=0.5, key="quad_ax")
+                    ay_coord = st.number_input("$y_A$", step=0.5, key="quad_ay")
+                    st.caption("Vertex C")
+                    cx_coord = st.number_input("$x_C$", step=0.5, key="quad_cx")
+                    cy_coord = st.number_input("$y_C$", step=0.5, key="quad_cy")
+                with coord_cols[1]:
+                    st.caption("Vertex B")
+                    bx_coord = st.number_input("$x_B$", step=0.5, key="quad_bx")
+                    by_coord = st.number_input("$y_B$", step=0.5, key="quad_by")
+                    st.caption("Vertex D")
+                    dx_coord = st.number_input("$x_D$", step=0.5, key="quad_dx")
+                    dy_coord = st.number_input("$y_D$", step=0.5, key="quad_dy")
     
     # === STYLE TAB ===
     with tab_style:
-        style_cols = st.columns(3)
-        line_style_opts = ["solid", "dashed", "dotted"]
-        with style_cols[0]:
-            quad_color = st.selectbox("Color", options=COLOR_OPTIONS,
-                                      index=get_index(COLOR_OPTIONS, "quad_color"), key="quad_color")
-        with style_cols[1]:
-            quad_line_style = st.selectbox("Line style", line_style_opts,
-                                           index=get_index(line_style_opts, "quad_line_style"), key="quad_line_style")
-        with style_cols[2]:
-            quad_fill = st.checkbox("Fill shape", key="quad_fill")
-        
-        if quad_fill:
-            fill_cols = st.columns(2)
-            with fill_cols[0]:
-                quad_fill_color = st.selectbox("Fill color", options=COLOR_OPTIONS,
-                                               index=get_index(COLOR_OPTIONS, "quad_fill_color"), key="quad_fill_color")
-            with fill_cols[1]:
-                quad_fill_alpha = st.slider("Fill opacity", 0.0, 1.0, key="quad_fill_alpha")
-        else:
-            quad_fill_color = quad_color
-            quad_fill_alpha = 0.2
+        if tab_style.open:
+            style_cols = st.columns(3)
+            line_style_opts = ["solid", "dashed", "dotted"]
+            with style_cols[0]:
+                quad_color = st.selectbox("Color", options=COLOR_OPTIONS,
+                                          index=get_index(COLOR_OPTIONS, "quad_color"), key="quad_color")
+            with style_cols[1]:
+                quad_line_style = st.selectbox("Line style", line_style_opts,
+                                               index=get_index(line_style_opts, "quad_line_style"), key="quad_line_style")
+            with style_cols[2]:
+                quad_fill = st.checkbox("Fill shape", key="quad_fill")
+            
+            if quad_fill:
+                fill_cols = st.columns(2)
+                with fill_cols[0]:
+                    quad_fill_color = st.selectbox("Fill color", options=COLOR_OPTIONS,
+                                                   index=get_index(COLOR_OPTIONS, "quad_fill_color"), key="quad_fill_color")
+                with fill_cols[1]:
+                    quad_fill_alpha = st.slider("Fill opacity", 0.0, 1.0, key="quad_fill_alpha")
+            else:
+                quad_fill_color = quad_color
+                quad_fill_alpha = 0.2
     
     # === VERTICES TAB ===
     with tab_vertices:
-        show_vertex_labels = st.checkbox("Show vertex labels", key="quad_show_vlabels")
-        
-        if show_vertex_labels:
-            st.write("")
-            vlabel_cols = st.columns(4)
-            with vlabel_cols[0]:
-                vertex_a_label = st.text_input("A", key="quad_vlabel_a")
-            with vlabel_cols[1]:
-                vertex_b_label = st.text_input("B", key="quad_vlabel_b")
-            with vlabel_cols[2]:
-                vertex_c_label = st.text_input("C", key="quad_vlabel_c")
-            with vlabel_cols[3]:
-                vertex_d_label = st.text_input("D", key="quad_vlabel_d")
+        if tab_vertices.open:
+            show_vertex_labels = st.checkbox("Show vertex labels", key="quad_show_vlabels")
             
-            vertex_label_dist = st.number_input("Distance from vertex", min_value=0.1, step=0.1, key="quad_vlabel_dist")
+            if show_vertex_labels:
+                st.write("")
+                vlabel_cols = st.columns(4)
+                with vlabel_cols[0]:
+                    vertex_a_label = st.text_input("A", key="quad_vlabel_a")
+                with vlabel_cols[1]:
+                    vertex_b_label = st.text_input("B", key="quad_vlabel_b")
+                with vlabel_cols[2]:
+                    vertex_c_label = st.text_input("C", key="quad_vlabel_c")
+                with vlabel_cols[3]:
+                    vertex_d_label = st.text_input("D", key="quad_vlabel_d")
+                
+                vertex_label_dist = st.number_input("Distance from vertex", min_value=0.1, step=0.1, key="quad_vlabel_dist")
     
     # === SIDES TAB ===
     with tab_sides:
-        show_side_labels = st.checkbox("Show side labels", key="quad_show_slabels")
-        
-        if show_side_labels:
-            side_names = ["Side AB", "Side BC", "Side CD", "Side DA"]
-            dir_opts = ["auto", "above", "below", "left", "right"]
-            for side_idx, side_name in enumerate(side_names):
-                with st.expander(f"{side_name}", expanded=(side_idx == 0)):
-                    sl_cols = st.columns([2, 1, 1, 1])
-                    with sl_cols[0]:
-                        st.text_input("Label", key=f"quad_slabel_{side_idx}", placeholder="e.g. $5$")
-                    with sl_cols[1]:
-                        st.slider("Position", 0.0, 1.0, key=f"quad_slabel_pos_{side_idx}")
-                    with sl_cols[2]:
-                        st.selectbox("Direction", dir_opts,
-                                    index=get_index(dir_opts, f"quad_slabel_dir_{side_idx}"),
-                                    key=f"quad_slabel_dir_{side_idx}")
-                    with sl_cols[3]:
-                        st.number_input("Dist", min_value=0.0, step=0.1, key=f"quad_slabel_dist_{side_idx}")
+        if tab_sides.open:
+            show_side_labels = st.checkbox("Show side labels", key="quad_show_slabels")
+            
+            if show_side_labels:
+                side_names = ["Side AB", "Side BC", "Side CD", "Side DA"]
+                dir_opts = ["auto", "above", "below", "left", "right"]
+                for side_idx, side_name in enumerate(side_names):
+                    with st.expander(f"{side_name}", expanded=(side_idx == 0)):
+                        sl_cols = st.columns([2, 1, 1, 1])
+                        with sl_cols[0]:
+                            st.text_input("Label", key=f"quad_slabel_{side_idx}", placeholder="e.g. $5$")
+                        with sl_cols[1]:
+                            st.slider("Position", 0.0, 1.0, key=f"quad_slabel_pos_{side_idx}")
+                        with sl_cols[2]:
+                            st.selectbox("Direction", dir_opts,
+                                        index=get_index(dir_opts, f"quad_slabel_dir_{side_idx}"),
+                                        key=f"quad_slabel_dir_{side_idx}")
+                        with sl_cols[3]:
+                            st.number_input("Dist", min_value=0.0, step=0.1, key=f"quad_slabel_dist_{side_idx}")
     
     # === ANGLES TAB ===
     with tab_angles:
-        show_angles = st.checkbox("Show angle markers", key="quad_show_angles")
-        
-        if show_angles:
-            st.caption("Show arcs at:")
-            angle_cols = st.columns(5)
-            with angle_cols[0]:
-                show_angle_a = st.checkbox("A", key="quad_angle_a")
-            with angle_cols[1]:
-                show_angle_b = st.checkbox("B", key="quad_angle_b")
-            with angle_cols[2]:
-                show_angle_c = st.checkbox("C", key="quad_angle_c")
-            with angle_cols[3]:
-                show_angle_d = st.checkbox("D", key="quad_angle_d")
-            with angle_cols[4]:
-                angle_radius = st.number_input("Radius", min_value=0.1, step=0.1, key="quad_angle_radius")
-            
-            st.caption("Use square (right angle) marker:")
-            right_cols = st.columns(5)
-            with right_cols[0]:
-                right_a = st.checkbox("A □", key="quad_right_a")
-            with right_cols[1]:
-                right_b = st.checkbox("B □", key="quad_right_b")
-            with right_cols[2]:
-                right_c = st.checkbox("C □", key="quad_right_c")
-            with right_cols[3]:
-                right_d = st.checkbox("D □", key="quad_right_d")
-            with right_cols[4]:
-                right_size = st.number_input("Size", min_value=0.1, step=0.1, key="quad_right_size")
+        if tab_angles.open:
+            show_angles = st.checkbox("Show angle markers", key="quad_show_angles")
             
-            st.caption("Angle labels:")
-            alabel_cols = st.columns(5)
-            with alabel_cols[0]:
-                st.text_input("A", key="quad_alabel_a", placeholder="$\\alpha$")
-            with alabel_cols[1]:
-                st.text_input("B", key="quad_alabel_b", placeholder="$\\beta$")
-            with alabel_cols[2]:
-                st.text_input("C", key="quad_alabel_c", placeholder="$\\gamma$")
-            with alabel_cols[3]:
-                st.text_input("D", key="quad_alabel_d", placeholder="$\\delta$")
-            with alabel_cols[4]:
-                angle_label_dist = st.number_input("Dist", min_value=0.1, step=0.1, key="quad_alabel_dist")
+            if show_angles:
+                st.caption("Show arcs at:")
+                angle_cols = st.columns(5)
+                with angle_cols[0]:
+                    show_angle_a = st.checkbox("A", key="quad_angle_a")
+                with angle_cols[1]:
+                    show_angle_b = st.checkbox("B", key="quad_angle_b")
+                with angle_cols[2]:
+                    show_angle_c = st.checkbox("C", key="quad_angle_c")
+                with angle_cols[3]:
+                    show_angle_d = st.checkbox("D", key="quad_angle_d")
+                with angle_cols[4]:
+                    angle_radius = st.number_input("Radius", min_value=0.1, step=0.1, key="quad_angle_radius")
+                
+                st.caption("Use square (right angle) marker:")
+                right_cols = st.columns(5)
+                with right_cols[0]:
+                    right_a = st.checkbox("A □", key="quad_right_a")
+                with right_cols[1]:
+                    right_b = st.checkbox("B □", key="quad_right_b")
+                with right_cols[2]:
+                    right_c = st.checkbox("C □", key="quad_right_c")
+                with right_cols[3]:
+                    right_d = st.checkbox("D □", key="quad_right_d")
+                with right_cols[4]:
+                    right_size = st.number_input("Size", min_value=0.1, step=0.1, key="quad_right_size")
+                
+                st.caption("Angle labels:")
+                alabel_cols = st.columns(5)
+                with alabel_cols[0]:
+                    st.text_input("A", key="quad_alabel_a", placeholder="$\\alpha$")
+                with alabel_cols[1]:
+                    st.text_input("B", key="quad_alabel_b", placeholder="$\\beta$")
+                with alabel_cols[2]:
+                    st.text_input("C", key="quad_alabel_c", placeholder="$\\gamma$")
+                with alabel_cols[3]:
+                    st.text_input("D", key="quad_alabel_d", placeholder="$\\delta$")
+                with alabel_cols[4]:
+                    angle_label_dist = st.number_input("Dist", min_value=0.1, step=0.1, key="quad_alabel_dist")
     
     # === MARKS TAB (Ticks & Parallel markers) ===
     with tab_marks:
-        st.caption("Tick marks (equal sides)")
-        show_ticks = st.checkbox("Show tick marks", key="quad_show_ticks")
-        
-        if show_ticks:
-            tick_cols = st.columns(5)
-            with tick_cols[0]:
-                ticks_ab = st.number_input("AB", min_value=0, max_value=3, key="quad_ticks_ab")
-            with tick_cols[1]:
-                ticks_bc = st.number_input("BC", min_value=0, max_value=3, key="quad_ticks_bc")
-            with tick_cols[2]:
-                ticks_cd = st.number_input("CD", min_value=0, max_value=3, key="quad_ticks_cd")
-            with tick_cols[3]:
-                ticks_da = st.number_input("DA", min_value=0, max_value=3, key="quad_ticks_da")
-            with tick_cols[4]:
-                tick_length = st.number_input("Length", min_value=0.05, step=0.05, key="quad_tick_length")
-        
-        st.markdown("---")
-        
-        st.caption("Parallel arrows")
-        show_parallel = st.checkbox("Show parallel markers", key="quad_show_parallel")
-        
-        if show_parallel:
-            para_cols = st.columns(4)
-            with para_cols[0]:
-                parallel_ab = st.number_input("AB →", min_value=0, max_value=3, key="quad_parallel_ab")
-            with para_cols[1]:
-                parallel_bc = st.number_input("BC →", min_value=0, max_value=3, key="quad_parallel_bc")
-            with para_cols[2]:
-                parallel_cd = st.number_input("CD →", min_value=0, max_value=3, key="quad_parallel_cd")
-            with para_cols[3]:
-                parallel_da = st.number_input("DA →", min_value=0, max_value=3, key="quad_parallel_da")
+        if tab_marks.open:
+            st.caption("Tick marks (equal sides)")
+            show_ticks = st.checkbox("Show tick marks", key="quad_show_ticks")
+            
+            if show_ticks:
+                tick_cols = st.columns(5)
+                with tick_cols[0]:
+                    ticks_ab = st.number_input("AB", min_value=0, max_value=3, key="quad_ticks_ab")
+                with tick_cols[1]:
+                    ticks_bc = st.number_input("BC", min_value=0, max_value=3, key="quad_ticks_bc")
+                with tick_cols[2]:
+                    ticks_cd = st.number_input("CD", min_value=0, max_value=3, key="quad_ticks_cd")
+                with tick_cols[3]:
+                    ticks_da = st.number_input("DA", min_value=0, max_value=3, key="quad_ticks_da")
+                with tick_cols[4]:
+                    tick_length = st.number_input("Length", min_value=0.05, step=0.05, key="quad_tick_length")
+            
+            st.markdown("---")
+            
+            st.caption("Parallel arrows")
+            show_parallel = st.checkbox("Show parallel markers", key="quad_show_parallel")
             
-            st.caption("Use same number of arrows on parallel sides")
+            if show_parallel:
+                para_cols = st.columns(4)
+                with para_cols[0]:
+                    parallel_ab = st.number_input("AB →", min_value=0, max_value=3, key="quad_parallel_ab")
+                with para_cols[1]:
+                    parallel_bc = st.number_input("BC →", min_value=0, max_value=3, key="quad_parallel_bc")
+                with para_cols[2]:
+                    parallel_cd = st.number_input("CD →", min_value=0, max_value=3, key="quad_parallel_cd")
+                with para_cols[3]:
+                    parallel_da = st.number_input("DA →", min_value=0, max_value=3, key="quad_parallel_da")
+                
+                st.caption("Use same number of arrows on parallel sides")
     
     # === DIAGONALS TAB ===
     with tab_diag:
-        st.caption("Diagonals")
-        diag_cols = st.columns(2)
-        with diag_cols[0]:
-            show_diag_ac = st.checkbox("Show diagonal AC", key="quad_show_diag_ac")
-            if show_diag_ac:
-                diag_label_ac = st.text_input("Label AC", key="quad_diag_label_ac")
-        with diag_cols[1]:
-            show_diag_bd = st.checkbox("Show diagonal BD", key="quad_show_diag_bd")
-            if show_diag_bd:
-                diag_label_bd = st.text_input("Label BD", key="quad_diag_label_bd")
+        if tab_diag.open:
+            st.caption("Diagonals")
+            diag_cols = st.columns(2)
+            with diag_cols[0]:
+                show_diag_ac = st.checkbox("Show diagonal AC", key="quad_show_diag_ac")
+                if show_diag_ac:
+                    diag_label_ac = st.text_input("Label AC", key="quad_diag_label_ac")
+            with diag_cols[1]:
+                show_diag_bd = st.checkbox("Show diagonal BD", key="quad_show_diag_bd")
+                if show_diag_bd:
+                    diag_label_bd = st.text_input("Label BD", key="quad_diag_label_bd")
 
 
 # --- Build Quadrilateral ---
-def build_quadrilateral():
-    """Build quadrilateral vertices from current input settings."""
+# Preset builder and the session state keys holding its dimensions, in argument order
+PRESET_BUILDERS = {
+    "Square": (get_square, ("quad_square_side",)),
+    "Rectangle": (get_rectangle, ("quad_rect_width", "quad_rect_height")),
+    "Parallelogram": (get_parallelogram, ("quad_para_base", "quad_para_side", "quad_para_angle")),
+    "Rhombus": (get_rhombus, ("quad_rhombus_side", "quad_rhombus_angle")),
+    "Trapezium": (get_trapezium, ("quad_trap_top", "quad_trap_bottom", "quad_trap_height", "quad_trap_offset")),
+    "Isosceles trapezium": (get_isosceles_trapezium, ("quad_trap_top", "quad_trap_bottom", "quad_trap_height")),
+    "Kite": (get_kite, ("quad_kite_d1", "quad_kite_d2", "quad_kite_split")),
+}
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def preset_vertices(preset_type, dims, rotation):
+    """Vertices of a preset shape, cached per shape type, dimensions and rotation."""
+    builder, _ = PRESET_BUILDERS[preset_type]
+    return builder(*dims, rotation=rotation)
+
+
+def build_quadrilateral(ss):
+    """Build quadrilateral vertices from a snapshot of the input settings."""
     try:
-        if input_method == "Preset shapes":
-            rotation = st.session_state.get("quad_preset_rotation", 0)
-            
-            if preset_type == "Square":
-                side = st.session_state.get("quad_square_side", 4.0)
-                vertices = get_square(side, rotation=rotation)
-            
-            elif preset_type == "Rectangle":
-                w = st.session_state.get("quad_rect_width", 5.0)
-                h = st.session_state.get("quad_rect_height", 3.0)
-                vertices = get_rectangle(w, h, rotation=rotation)
-            
-            elif preset_type == "Parallelogram":
-                base = st.session_state.get("quad_para_base", 5.0)
-                side = st.session_state.get("quad_para_side", 3.0)
-                angle = st.session_state.get("quad_para_angle", 60.0)
-                vertices = get_parallelogram(base, side, angle, rotation=rotation)
-            
-            elif preset_type == "Rhombus":
-                side = st.session_state.get("quad_rhombus_side", 4.0)
-                angle = st.session_state.get("quad_rhombus_angle", 60.0)
-                vertices = get_rhombus(side, angle, rotation=rotation)
-            
-            elif preset_type == "Trapezium":
-                top = st.session_state.get("quad_trap_top", 3.0)
-                bottom = st.session_state.get("quad_trap_bottom", 5.0)
-                height = st.session_state.get("quad_trap_height", 3.0)
-                offset = st.session_state.get("quad_trap_offset", 0.0)
-                vertices = get_trapezium(top, bottom, height, offset, rotation=rotation)
-            
-            elif preset_type == "Isosceles trapezium":
-                top = st.session_state.get("quad_trap_top", 3.0)
-                bottom = st.session_state.get("quad_trap_bottom", 5.0)
-                height = st.session_state.get("quad_trap_height", 3.0)
-                vertices = get_isosceles_trapezium(top, bottom, height, rotation=rotation)
-            
-            elif preset_type == "Kite":
-                d1 = st.session_state.get("quad_kite_d1", 4.0)
-                d2 = st.session_state.get("quad_kite_d2", 6.0)
-                split = st.session_state.get("quad_kite_split", 0.3)
-                vertices = get_kite(d1, d2, split, rotation=rotation)
+        preset_type = ss["quad_preset_type"]
+        if ss["quad_input_method"] == "Preset shapes":
+            rotation = ss.get("quad_preset_rotation", 0)
             
+            if preset_type in PRESET_BUILDERS:
+                _, dim_keys = PRESET_BUILDERS[preset_type]
+                dims = tuple(ss[key] for key in dim_keys)
+                vertices = preset_vertices(preset_type, dims, rotation)
             else:
                 vertices = get_square(4.0)
         
         else:  # Coordinates
-            coords = [
-                (st.session_state.get("quad_ax", -2), st.session_state.get("quad_ay", 0)),
-                (st.session_state.get("quad_bx", 2), st.session_state.get("quad_by", 0)),
-                (st.session_state.get("quad_cx", 3), st.session_state.get("quad_cy", 3)),
-                (st.session_state.get("quad_dx", -1), st.session_state.get("quad_dy", 3)),
-            ]
-            vertices = get_quadrilateral_vertices_from_coordinates(coords)
+            vertices = np.array([
+                [ss.get("quad_ax", -2), ss.get("quad_ay", 0)],
+                [ss.get("quad_bx", 2), ss.get("quad_by", 0)],
+                [ss.get("quad_cx", 3), ss.get("quad_cy", 3)],
+                [ss.get("quad_dx", -1), ss.get("quad_dy", 3)],
+            ], dtype=float)
         
         return vertices
     except Exception as e:
@@ -517,16 +520,35 @@ def build_quadrilateral():
 
 
 # --- Render Quadrilateral ---
-def render_quadrilateral():
-    """Render the quadrilateral with all configured options."""
+def draw_quadrilateral_figure(vertices, padding, axis_weight, label_size, white_background,
+                              quad_color, quad_line_style, quad_fill, quad_fill_color,
+                              quad_fill_alpha, diagonals, angle_markers, angle_radius,
+                              right_size, angle_label_dist, tick_marks, tick_length,
+                              parallel_marks, side_labels, vertex_labels, vlabel_dist):
+    """
+    Draw the quadrilateral with all configured options.
+    
+    Vertices arrive already resolved from the preset or coordinates and the
+    marks as tuples from quadrilateral_spec, so nothing here reads session state.
     
-    vertices = build_quadrilateral()
+    Returns:
+        Matplotlib figure
+    """
+    # Display-only geometry, so single precision is plenty
+    vertices = np.ascontiguousarray(vertices, dtype=np.float32)
     centroid = get_centroid(vertices)
+    # Side i runs from vertex i to the next vertex
+    side_ends = np.roll(vertices, -1, axis=0)
+    side_vecs, side_lens = get_side_vectors(vertices)
+    outward_signs = get_outward_signs(vertices, side_vecs, centroid)
     
     # Create figure
     fig, ax = plt.subplots(figsize=(fig_width, fig_height))
     ax.set_aspect('equal')
     ax.axis('off')
+    # The axes fill the figure; the limits already include the padding and
+    # exports crop to the drawn content, so no tight_layout pass is needed
+    fig.subplots_adjust(left=0, right=1, bottom=0, top=1)
     
     # Set limits
     auto_set_limits(ax, vertices, padding)
@@ -535,30 +557,21 @@ def render_quadrilateral():
     apply_figure_style(fig, ax, white_background)
     
     line_width = axis_weight * 1.3
-    line_style_map = {"solid": "-", "dashed": "--", "dotted": ":"}
+    stroke = MY_COLORS[quad_color]
     
     # --- Draw diagonals first (behind the main shape) ---
-    show_diag_ac = st.session_state.get("quad_show_diag_ac", False)
-    show_diag_bd = st.session_state.get("quad_show_diag_bd", False)
-    
-    if show_diag_ac:
-        draw_diagonal(ax, vertices, 'AC', color=MY_COLORS[quad_color], 
-                     line_width=line_width * 0.7, line_style='--',
-                     label=st.session_state.get("quad_diag_label_ac", ""),
-                     font_size=label_size, white_background=white_background)
-    
-    if show_diag_bd:
-        draw_diagonal(ax, vertices, 'BD', color=MY_COLORS[quad_color],
+    for diagonal, diag_label in diagonals:
+        draw_diagonal(ax, vertices, diagonal, color=stroke,
                      line_width=line_width * 0.7, line_style='--',
-                     label=st.session_state.get("quad_diag_label_bd", ""),
+                     label=diag_label,
                      font_size=label_size, white_background=white_background)
     
     # --- Draw main quadrilateral ---
     draw_quadrilateral(
         ax, vertices,
-        color=MY_COLORS[quad_color],
+        color=stroke,
         line_width=line_width,
-        line_style=line_style_map.get(quad_line_style, '-'),
+        line_style=LINE_STYLE_MAP.get(quad_line_style, '-'),
         fill=quad_fill,
         fill_color=MY_COLORS[quad_fill_color] if quad_fill else None,
         fill_alpha=quad_fill_alpha,
@@ -566,106 +579,149 @@ def render_quadrilateral():
     )
     
     # --- Draw angle markers ---
-    show_angles = st.session_state.get("quad_show_angles", False)
-    if show_angles:
-        angle_radius = st.session_state.get("quad_angle_radius", 0.5)
-        right_size = st.session_state.get("quad_right_size", 0.4)
-        angle_label_dist = st.session_state.get("quad_alabel_dist", 0.3)
-        
-        vertex_keys = ['a', 'b', 'c', 'd']
-        for i, vk in enumerate(vertex_keys):
-            show_this = st.session_state.get(f"quad_angle_{vk}", True)
-            use_right = st.session_state.get(f"quad_right_{vk}", False)
-            angle_label = st.session_state.get(f"quad_alabel_{vk}", "")
-            
-            if show_this:
-                if use_right:
-                    draw_right_angle_marker(ax, vertices, i, size=right_size,
-                                           color=MY_COLORS[quad_color], line_width=line_width * 0.8)
-                else:
-                    draw_angle_arc(ax, vertices, i, radius=angle_radius,
-                                  color=MY_COLORS[quad_color], line_width=line_width * 0.8)
-                
-                if angle_label:
-                    draw_angle_label(ax, vertices, i, angle_label, radius=angle_radius,
-                                    distance=angle_label_dist, color=MY_COLORS[quad_color],
-                                    font_size=label_size * 0.8, white_background=white_background)
+    draw_angle_markers(
+        ax, vertices,
+        [i for i, use_right, _ in angle_markers if not use_right],
+        [i for i, use_right, _ in angle_markers if use_right],
+        radius=angle_radius, size=right_size,
+        color=stroke, line_width=line_width * 0.8
+    )
+    for i, _, angle_label in angle_markers:
+        if angle_label:
+            draw_angle_label(ax, vertices, i, angle_label, radius=angle_radius,
+                            distance=angle_label_dist, color=stroke,
+                            font_size=label_size * 0.8, white_background=white_background)
     
     # --- Draw tick marks ---
-    show_ticks = st.session_state.get("quad_show_ticks", False)
-    if show_ticks:
-        tick_length = st.session_state.get("quad_tick_length", 0.25)
-        tick_counts = [
-            st.session_state.get("quad_ticks_ab", 0),
-            st.session_state.get("quad_ticks_bc", 0),
-            st.session_state.get("quad_ticks_cd", 0),
-            st.session_state.get("quad_ticks_da", 0),
-        ]
-        for i, count in enumerate(tick_counts):
-            if count > 0:
-                p1, p2 = vertices[i], vertices[(i + 1) % 4]
-                draw_tick_marks(ax, p1, p2, count, tick_length=tick_length,
-                               color=MY_COLORS[quad_color], line_width=line_width * 0.8)
+    for i, count in tick_marks:
+        draw_tick_marks(ax, vertices[i], side_ends[i], count, tick_length=tick_length,
+                       color=stroke, line_width=line_width * 0.8,
+                       side_vec=side_vecs[i], side_len=side_lens[i])
     
     # --- Draw parallel markers ---
-    show_parallel = st.session_state.get("quad_show_parallel", False)
-    if show_parallel:
-        parallel_counts = [
-            st.session_state.get("quad_parallel_ab", 0),
-            st.session_state.get("quad_parallel_bc", 0),
-            st.session_state.get("quad_parallel_cd", 0),
-            st.session_state.get("quad_parallel_da", 0),
-        ]
-        for i, count in enumerate(parallel_counts):
-            if count > 0:
-                p1, p2 = vertices[i], vertices[(i + 1) % 4]
-                draw_parallel_marks(ax, p1, p2, count, arrow_size=0.25,
-                                   color=MY_COLORS[quad_color], line_width=line_width * 0.8)
+    for i, count in parallel_marks:
+        draw_parallel_marks(ax, vertices[i], side_ends[i], count, arrow_size=0.25,
+                           color=stroke, line_width=line_width * 0.8,
+                           side_vec=side_vecs[i], side_len=side_lens[i])
     
     # --- Draw side labels ---
-    show_slabels = st.session_state.get("quad_show_slabels", False)
-    if show_slabels:
-        for i in range(4):
-            label = st.session_state.get(f"quad_slabel_{i}", "")
-            if label:
-                pos = st.session_state.get(f"quad_slabel_pos_{i}", 0.5)
-                direction = st.session_state.get(f"quad_slabel_dir_{i}", "auto")
-                dist = st.session_state.get(f"quad_slabel_dist_{i}", 0.4)
-                p1, p2 = vertices[i], vertices[(i + 1) % 4]
-                draw_side_label(ax, p1, p2, label, position=pos, direction=direction,
-                               distance=dist, color=MY_COLORS[quad_color],
-                               font_size=label_size * 0.85, centroid=centroid,
-                               white_background=white_background)
+    for i, label, pos, direction, dist in side_labels:
+        draw_side_label(ax, vertices[i], side_ends[i], label, position=pos, direction=direction,
+                       distance=dist, color=stroke,
+                       font_size=label_size * 0.85, centroid=centroid,
+                       white_background=white_background,
+                       side_vec=side_vecs[i], side_len=side_lens[i],
+                       outward_sign=outward_signs[i])
     
     # --- Draw vertex labels ---
-    show_vlabels = st.session_state.get("quad_show_vlabels", True)
-    if show_vlabels:
-        vlabel_dist = st.session_state.get("quad_vlabel_dist", 0.5)
-        labels = [
-            st.session_state.get("quad_vlabel_a", "$A$"),
-            st.session_state.get("quad_vlabel_b", "$B$"),
-            st.session_state.get("quad_vlabel_c", "$C$"),
-            st.session_state.get("quad_vlabel_d", "$D$"),
-        ]
-        for i, label in enumerate(labels):
-            if label:
-                draw_vertex_label(ax, vertices[i], label, direction='auto',
-                                 distance=vlabel_dist, color=MY_COLORS[quad_color],
-                                 font_size=label_size, centroid=centroid,
-                                 white_background=white_background)
-    
-    fig.tight_layout()
+    for i, label in vertex_labels:
+        draw_vertex_label(ax, vertices[i], label, direction='auto',
+                         distance=vlabel_dist, color=stroke,
+                         font_size=label_size, centroid=centroid,
+                         white_background=white_background)
+    
     return fig
 
 
+@st.cache_data(show_spinner=False, max_entries=32)
+def render_quadrilateral(spec):
+    """
+    Preview PNG of the quadrilateral at 200 dpi with a tight bounding box.
+    Switching back to an earlier preset or mark setting reuses its render.
+    """
+    fig = draw_quadrilateral_figure(*spec)
+    preview_buffer = io.BytesIO()
+    fig.savefig(preview_buffer, format="png", dpi=200, bbox_inches="tight")
+    plt.close(fig)
+    return preview_buffer.getvalue()
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def export_quadrilateral(spec):
+    """SVG and PNG bytes for the quadrilateral downloads, only made once one is requested."""
+    fig = draw_quadrilateral_figure(*spec)
+    svg_data, png_data = export_figure(fig)
+    plt.close(fig)
+    return svg_data, png_data
+
+
+def quadrilateral_spec():
+    """Collect everything that affects the diagram into a hashable plot spec."""
+    # One snapshot of session state for every lookup below
+    ss = st.session_state.to_dict()
+    vertex_keys = ['a', 'b', 'c', 'd']
+    side_keys = ['ab', 'bc', 'cd', 'da']
+    
+    diagonals = tuple(
+        (diagonal, ss.get(f"quad_diag_label_{diagonal.lower()}", ""))
+        for diagonal in ('AC', 'BD')
+        if ss.get(f"quad_show_diag_{diagonal.lower()}", False)
+    )
+    
+    show_angles = ss.get("quad_show_angles", False)
+    angle_markers = tuple(
+        (i, ss.get(f"quad_right_{vk}", False), ss.get(f"quad_alabel_{vk}", ""))
+        for i, vk in enumerate(vertex_keys)
+        if show_angles and ss.get(f"quad_angle_{vk}", True)
+    )
+    
+    show_ticks = ss.get("quad_show_ticks", False)
+    tick_marks = tuple(
+        (i, ss.get(f"quad_ticks_{sk}", 0))
+        for i, sk in enumerate(side_keys)
+        if show_ticks and ss.get(f"quad_ticks_{sk}", 0) > 0
+    )
+    
+    show_parallel = ss.get("quad_show_parallel", False)
+    parallel_marks = tuple(
+        (i, ss.get(f"quad_parallel_{sk}", 0))
+        for i, sk in enumerate(side_keys)
+        if show_parallel and ss.get(f"quad_parallel_{sk}", 0) > 0
+    )
+    
+    show_slabels = ss.get("quad_show_slabels", False)
+    side_labels = tuple(
+        (i, ss.get(f"quad_slabel_{i}", ""), ss.get(f"quad_slabel_pos_{i}", 0.5),
+         ss.get(f"quad_slabel_dir_{i}", "auto"), ss.get(f"quad_slabel_dist_{i}", 0.4))
+        for i in range(4)
+        if show_slabels and ss.get(f"quad_slabel_{i}", "")
+    )
+    
+    show_vlabels = ss.get("quad_show_vlabels", True)
+    vertex_labels = tuple(
+        (i, ss.get(f"quad_vlabel_{vk}", f"${vk.upper()}$"))
+        for i, vk in enumerate(vertex_keys)
+        if show_vlabels and ss.get(f"quad_vlabel_{vk}", f"${vk.upper()}$")
+    )
+    
+    return (
+        tuple(map(tuple, build_quadrilateral(ss).tolist())),
+        padding, axis_weight, label_size, white_background,
+        ss["quad_color"], ss["quad_line_style"], ss["quad_fill"],
+        ss["quad_fill_color"] if ss["quad_fill"] else ss["quad_color"],
+        ss["quad_fill_alpha"] if ss["quad_fill"] else 0.2,
+        diagonals,
+        angle_markers,
+        ss.get("quad_angle_radius", 0.5) if show_angles else None,
+        ss.get("quad_right_size", 0.4) if show_angles else None,
+        ss.get("quad_alabel_dist", 0.3) if show_angles else None,
+        tick_marks,
+        ss.get("quad_tick_length", 0.25) if show_ticks else None,
+        parallel_marks,
+        side_labels,
+        vertex_labels,
+        ss.get("quad_vlabel_dist", 0.5) if show_vlabels else None,
+    )
+
+
 # --- Main Rendering Logic ---
 try:
-    fig = render_quadrilateral()
-    plot_placeholder.pyplot(fig)
-    create_download_buttons(fig, svg_placeholder, png_placeholder, "quadrilateral")
-    plt.close(fig)
+    spec = quadrilateral_spec()
+    plot_placeholder.image(render_quadrilateral(spec), width="stretch")
+    # Download buttons, rendered only when clicked
+    show_download_buttons(lambda: export_quadrilateral(spec)[0], lambda: export_quadrilateral(spec)[1],
+                          svg_placeholder, png_placeholder, "quadrilateral")
 except Exception as e:
     st.error(f"Error rendering: {e}")
     import traceback
     st.code(traceback.format_exc())
-
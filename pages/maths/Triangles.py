@@ -3,6 +3,7 @@ Triangle Diagrams Page
 Creates educational triangle diagrams with labeled sides, angles, and markers.
 """
 
+import io
 import numpy as np
 import matplotlib.pyplot as plt
 import streamlit as st
@@ -11,7 +12,8 @@ from shared_utils import (
     MY_COLORS, 
     AXIS_COLOR,
     get_color_options,
-    create_download_buttons,
+    export_figure,
+    show_download_buttons,
     apply_figure_style,
     init_session_state,
     DEFAULT_WHITE_BG
@@ -21,13 +23,11 @@ from triangle_utils import (
     get_triangle_vertices_from_coordinates,
     draw_triangle,
     draw_side_label,
-    draw_angle_arc,
-    draw_right_angle_marker,
+    draw_angle_markers,
     draw_angle_label,
     draw_vertex_label,
     draw_tick_marks,
-    get_vertex_angle,
-    get_side_length,
+    get_triangle_metrics,
     get_equilateral_triangle,
     get_isoceles_triangle,
     get_right_triangle,
@@ -76,6 +76,10 @@ for i in range(3):
     TRI_DEFAULTS[f"tri_slabel_dist_{i}"] = 0.4
 
 init_session_state(TRI_DEFAULTS)
+# Tabs that are not open skip their widgets, e.g. the tick controls while sides
+# are being edited; writing each key back keeps those values across reruns
+for key in TRI_DEFAULTS:
+    st.session_state[key] = st.session_state[key]
 
 
 # Helper to get selectbox index from session state value
@@ -87,11 +91,22 @@ def get_index(options, key):
         return 0
 
 
+# Decimal places kept for floats in cache keys: far finer than anything visible,
+# but coarse enough that values differing only by float rounding share an entry
+KEY_DECIMALS = 9
+
+
+def key_float(value):
+    """Round a float setting for use in a cache key."""
+    return round(float(value), KEY_DECIMALS)
+
+
 COLOR_OPTIONS = get_color_options()
 
 
 # --- Sidebar: Appearance Settings ---
-with st.sidebar:
+# The triangle is redrawn once on Apply instead of at every step of these sliders
+with st.sidebar.form("tri_appearance", border=False):
     st.header("Appearance")
     
     axis_weight = st.slider(
@@ -114,12 +129,16 @@ with st.sidebar:
     
     st.write("")
     white_background = st.toggle("White background", key="tri_white_bg")
+    
+    st.form_submit_button("Apply")
 
 
 # Fixed figure size
 fig_height = 8
 fig_width = 8
 
+LINE_STYLE_MAP = {"solid": "-", "dashed": "--", "dotted": ":"}
+
 
 # --- Main Layout ---
 col_plot, col_controls = st.columns([1.5, 1])
@@ -145,260 +164,318 @@ with col_controls:
         "Sides",
         "Angles",
         "Ticks"
-    ])
+    ], key="tri_tab", on_change="rerun")
     
     # === DEFINITION TAB ===
     with tab_def:
-        input_method = st.radio(
-            "Define triangle by:",
-            ["Side lengths (SSS)", "Coordinates", "Preset shapes"],
-            horizontal=True,
-            key="tri_input_method"
-        )
-        
-        st.write("")
-        
-        # --- Side lengths input ---
-        if input_method == "Side lengths (SSS)":
-            side_cols = st.columns(3)
-            with side_cols[0]:
-                side_a = st.number_input("Side $a$", min_value=0.01, step=0.1, key="tri_side_a",
-                                         help="Opposite to vertex A")
-            with side_cols[1]:
-                side_b = st.number_input("Side $b$", min_value=0.01, step=0.1, key="tri_side_b",
-                                         help="Opposite to vertex B")
-            with side_cols[2]:
-                side_c = st.number_input("Side $c$ (base)", min_value=0.01, step=0.1, key="tri_side_c",
-                                         help="The base of the triangle")
+        if tab_def.open:
+            input_method = st.radio(
+                "Define triangle by:",
+                ["Side lengths (SSS)", "Coordinates", "Preset shapes"],
+                horizontal=True,
+                key="tri_input_method"
+            )
             
-            st.caption("Position")
-            pos_cols = st.columns(3)
-            with pos_cols[0]:
-                base_x = st.number_input("Center $x$", step=0.5, key="tri_base_x")
-            with pos_cols[1]:
-                base_y = st.number_input("Center $y$", step=0.5, key="tri_base_y")
-            with pos_cols[2]:
-                rotation = st.number_input("Rotation (°)", step=15.0, key="tri_rotation")
-        
-        # --- Coordinates input ---
-        elif input_method == "Coordinates":
-            coord_cols = st.columns(3)
-            with coord_cols[0]:
-                st.caption("Vertex A")
-                ax_coord = st.number_input("$x_A$", step=0.5, key="tri_ax")
-                ay_coord = st.number_input("$y_A$", step=0.5, key="tri_ay")
-            with coord_cols[1]:
-                st.caption("Vertex B")
-                bx_coord = st.number_input("$x_B$", step=0.5, key="tri_bx")
-                by_coord = st.number_input("$y_B$", step=0.5, key="tri_by")
-            with coord_cols[2]:
-                st.caption("Vertex C")
-                cx_coord = st.number_input("$x_C$", step=0.5, key="tri_cx")
-                cy_coord = st.number_input("$y_C$", step=0.5, key="tri_cy")
-        
-        # --- Preset shapes ---
-        else:
-            preset_opts = ["Equilateral", "Isoceles", "Right triangle", "30-60-90", "45-45-90"]
-            preset_cols = st.columns([2, 1])
-            with preset_cols[0]:
-                preset_type = st.selectbox(
-                    "Preset type", preset_opts,
-                    index=get_index(preset_opts, "tri_preset_type"),
-                    key="tri_preset_type"
-                )
-            with preset_cols[1]:
-                preset_rotation = st.number_input("Rotation (°)", step=15.0, key="tri_preset_rotation")
+            st.write("")
+            
+            # --- Side lengths input ---
+            if input_method == "Side lengths (SSS)":
+                side_cols = st.columns(3)
+                with side_cols[0]:
+                    side_a = st.number_input("Side $a$", min_value=0.01, step=0.1, key="tri_side_a",
+                                             help="Opposite to vertex A")
+                with side_cols[1]:
+                    side_b = st.number_input("Side $b$", min_value=0.01, step=0.1, key="tri_side_b",
+                                             help="Opposite to vertex B")
+                with side_cols[2]:
+                    side_c = st.number_input("Side $c$ (base)", min_value=0.01, step=0.1, key="tri_side_c",
+                                             help="The base of the triangle")
+                
+                st.caption("Position")
+                pos_cols = st.columns(3)
+                with pos_cols[0]:
+                    base_x = st.number_input("Center $x$", step=0.5, key="tri_base_x")
+                with pos_cols[1]:
+                    base_y = st.number_input("Center $y$", step=0.5, key="tri_base_y")
+                with pos_cols[2]:
+                    rotation = st.number_input("Rotation (°)", step=15.0, key="tri_rotation")
+            
+            # --- Coordinates input ---
+            elif input_method == "Coordinates":
+                coord_cols = st.columns(3)
+                with coord_cols[0]:
+                    st.caption("Vertex A")
+                    ax_coord = st.number_input("$x_A$", step=0.5, key="tri_ax")
+                    ay_coord = st.number_input("$y_A$", step=0.5, key="tri_ay")
+                with coord_cols[1]:
+                    st.caption("Vertex B")
+                    bx_coord = st.number_input("$x_B$", step=0.5, key="tri_bx")
+                    by_coord = st.number_input("$y_B$", step=0.5, key="tri_by")
+                with coord_cols[2]:
+                    st.caption("Vertex C")
+                    cx_coord = st.number_input("$x_C$", step=0.5, key="tri_cx")
+                    cy_coord = st.number_input("$y_C$", step=0.5, key="tri_cy")
             
-            if preset_type == "Equilateral":
-                preset_side = st.number_input("Side length", min_value=0.01, step=0.5, key="tri_preset_side")
-            elif preset_type == "Isoceles":
-                iso_cols = st.columns(2)
-                with iso_cols[0]:
-                    preset_base = st.number_input("Base", min_value=0.01, step=0.5, key="tri_preset_base")
-                with iso_cols[1]:
-                    preset_leg = st.number_input("Legs", min_value=0.01, step=0.5, key="tri_preset_leg")
-            elif preset_type == "Right triangle":
-                rt_cols = st.columns(2)
-                with rt_cols[0]:
-                    preset_base = st.number_input("Base", min_value=0.01, step=0.5, key="tri_preset_base_rt")
-                with rt_cols[1]:
-                    preset_height = st.number_input("Height", min_value=0.01, step=0.5, key="tri_preset_height")
-            elif preset_type == "30-60-90":
-                preset_short = st.number_input("Short leg", min_value=0.01, step=0.5, key="tri_preset_short")
-            else:  # 45-45-90
-                preset_leg_45 = st.number_input("Leg length", min_value=0.01, step=0.5, key="tri_preset_leg_45")
+            # --- Preset shapes ---
+            else:
+                preset_opts = ["Equilateral", "Isoceles", "Right triangle", "30-60-90", "45-45-90"]
+                preset_cols = st.columns([2, 1])
+                with preset_cols[0]:
+                    preset_type = st.selectbox(
+                        "Preset type", preset_opts,
+                        index=get_index(preset_opts, "tri_preset_type"),
+                        key="tri_preset_type"
+                    )
+                with preset_cols[1]:
+                    preset_rotation = st.number_input("Rotation (°)", step=15.0, key="tri_preset_rotation")
+                
+                if preset_type == "Equilateral":
+                    preset_side = st.number_input("Side length", min_value=0.01, step=0.5, key="tri_preset_side")
+                elif preset_type == "Isoceles":
+                    iso_cols = st.columns(2)
+                    with iso_cols[0]:
+                        preset_base = st.number_input("Base", min_value=0.01, step=0.5, key="tri_preset_base")
+                    with iso_cols[1]:
+                        preset_leg = st.number_input("Legs", min_value=0.01, step=0.5, key="tri_preset_leg")
+                elif preset_type == "Right triangle":
+                    rt_cols = st.columns(2)
+                    with rt_cols[0]:
+                        preset_base = st.number_input("Base", min_value=0.01, step=0.5, key="tri_preset_base_rt")
+                    with rt_cols[1]:
+                        preset_height = st.number_input("Height", min_value=0.01, step=0.5, key="tri_preset_height")
+                elif preset_type == "30-60-90":
+                    preset_short = st.number_input("Short leg", min_value=0.01, step=0.5, key="tri_preset_short")
+                else:  # 45-45-90
+                    preset_leg_45 = st.number_input("Leg length", min_value=0.01, step=0.5, key="tri_preset_leg_45")
     
     # === STYLE TAB ===
     with tab_style:
-        style_cols = st.columns(3)
-        line_style_opts = ["solid", "dashed", "dotted"]
-        with style_cols[0]:
-            tri_color = st.selectbox("Color", options=COLOR_OPTIONS, 
-                                     index=get_index(COLOR_OPTIONS, "tri_color"), key="tri_color")
-        with style_cols[1]:
-            tri_line_style = st.selectbox("Line style", line_style_opts,
-                                          index=get_index(line_style_opts, "tri_line_style"), key="tri_line_style")
-        with style_cols[2]:
-            tri_fill = st.checkbox("Fill triangle", key="tri_fill")
-        
-        if tri_fill:
-            fill_cols = st.columns(2)
-            with fill_cols[0]:
-                tri_fill_color = st.selectbox("Fill color", options=COLOR_OPTIONS,
-                                              index=get_index(COLOR_OPTIONS, "tri_fill_color"), key="tri_fill_color")
-            with fill_cols[1]:
-                tri_fill_alpha = st.slider("Fill opacity", 0.0, 1.0, key="tri_fill_alpha")
-        else:
-            tri_fill_color = tri_color
-            tri_fill_alpha = 0.2
+        if tab_style.open:
+            style_cols = st.columns(3)
+            line_style_opts = ["solid", "dashed", "dotted"]
+            with style_cols[0]:
+                tri_color = st.selectbox("Color", options=COLOR_OPTIONS, 
+                                         index=get_index(COLOR_OPTIONS, "tri_color"), key="tri_color")
+            with style_cols[1]:
+                tri_line_style = st.selectbox("Line style", line_style_opts,
+                                              index=get_index(line_style_opts, "tri_line_style"), key="tri_line_style")
+            with style_cols[2]:
+                tri_fill = st.checkbox("Fill triangle", key="tri_fill")
+            
+            if tri_fill:
+                fill_cols = st.columns(2)
+                with fill_cols[0]:
+                    tri_fill_color = st.selectbox("Fill color", options=COLOR_OPTIONS,
+                                                  index=get_index(COLOR_OPTIONS, "tri_fill_color"), key="tri_fill_color")
+                with fill_cols[1]:
+                    tri_fill_alpha = st.slider("Fill opacity", 0.0, 1.0, key="tri_fill_alpha")
+            else:
+                tri_fill_color = tri_color
+                tri_fill_alpha = 0.2
     
     # === VERTICES TAB ===
     with tab_vertices:
-        show_vertex_labels = st.checkbox("Show vertex labels", key="tri_show_vlabels")
-        
-        if show_vertex_labels:
-            st.write("")
-            vlabel_cols = st.columns(3)
-            with vlabel_cols[0]:
-                vertex_a_label = st.text_input("Label A", key="tri_vlabel_a")
-            with vlabel_cols[1]:
-                vertex_b_label = st.text_input("Label B", key="tri_vlabel_b")
-            with vlabel_cols[2]:
-                vertex_c_label = st.text_input("Label C", key="tri_vlabel_c")
+        if tab_vertices.open:
+            show_vertex_labels = st.checkbox("Show vertex labels", key="tri_show_vlabels")
             
-            vertex_label_dist = st.number_input("Distance from vertex", min_value=0.1, step=0.1, key="tri_vlabel_dist")
+            if show_vertex_labels:
+                st.write("")
+                vlabel_cols = st.columns(3)
+                with vlabel_cols[0]:
+                    vertex_a_label = st.text_input("Label A", key="tri_vlabel_a")
+                with vlabel_cols[1]:
+                    vertex_b_label = st.text_input("Label B", key="tri_vlabel_b")
+                with vlabel_cols[2]:
+                    vertex_c_label = st.text_input("Label C", key="tri_vlabel_c")
+                
+                vertex_label_dist = st.number_input("Distance from vertex", min_value=0.1, step=0.1, key="tri_vlabel_dist")
     
     # === SIDES TAB ===
     with tab_sides:
-        show_side_labels = st.checkbox("Show side labels", key="tri_show_slabels")
-        
-        if show_side_labels:
-            side_names = ["Side AB (opposite C)", "Side BC (opposite A)", "Side CA (opposite B)"]
-            dir_opts = ["auto", "above", "below", "left", "right"]
-            for side_idx, side_name in enumerate(side_names):
-                with st.expander(f"{side_name}", expanded=(side_idx == 0)):
-                    sl_cols = st.columns([2, 1, 1, 1])
-                    with sl_cols[0]:
-                        st.text_input("Label", key=f"tri_slabel_{side_idx}", placeholder="e.g. $5$")
-                    with sl_cols[1]:
-                        st.slider("Position", 0.0, 1.0, key=f"tri_slabel_pos_{side_idx}", help="Along side")
-                    with sl_cols[2]:
-                        st.selectbox(
-                            "Direction", dir_opts,
-                            index=get_index(dir_opts, f"tri_slabel_dir_{side_idx}"),
-                            key=f"tri_slabel_dir_{side_idx}"
-                        )
-                    with sl_cols[3]:
-                        st.number_input("Distance", min_value=0.0, step=0.1, key=f"tri_slabel_dist_{side_idx}")
+        if tab_sides.open:
+            show_side_labels = st.checkbox("Show side labels", key="tri_show_slabels")
+            
+            if show_side_labels:
+                side_names = ["Side AB (opposite C)", "Side BC (opposite A)", "Side CA (opposite B)"]
+                dir_opts = ["auto", "above", "below", "left", "right"]
+                for side_idx, side_name in enumerate(side_names):
+                    with st.expander(f"{side_name}", expanded=(side_idx == 0)):
+                        sl_cols = st.columns([2, 1, 1, 1])
+                        with sl_cols[0]:
+                            st.text_input("Label", key=f"tri_slabel_{side_idx}", placeholder="e.g. $5$")
+                        with sl_cols[1]:
+                            st.slider("Position", 0.0, 1.0, key=f"tri_slabel_pos_{side_idx}", help="Along side")
+                        with sl_cols[2]:
+                            st.selectbox(
+                                "Direction", dir_opts,
+                                index=get_index(dir_opts, f"tri_slabel_dir_{side_idx}"),
+                                key=f"tri_slabel_dir_{side_idx}"
+                            )
+                        with sl_cols[3]:
+                            st.number_input("Distance", min_value=0.0, step=0.1, key=f"tri_slabel_dist_{side_idx}")
     
     # === ANGLES TAB ===
     with tab_angles:
-        show_angles = st.checkbox("Show angle markers", key="tri_show_angles")
-        
-        if show_angles:
-            st.caption("Show arcs at:")
-            angle_cols = st.columns(4)
-            with angle_cols[0]:
-                show_angle_a = st.checkbox("Angle A", key="tri_angle_a")
-            with angle_cols[1]:
-                show_angle_b = st.checkbox("Angle B", key="tri_angle_b")
-            with angle_cols[2]:
-                show_angle_c = st.checkbox("Angle C", key="tri_angle_c")
-            with angle_cols[3]:
-                angle_radius = st.number_input("Arc radius", min_value=0.1, step=0.1, key="tri_angle_radius")
+        if tab_angles.open:
+            show_angles = st.checkbox("Show angle markers", key="tri_show_angles")
             
-            st.caption("Use square (right angle) marker instead:")
-            right_cols = st.columns(4)
-            with right_cols[0]:
-                right_a = st.checkbox("A □", key="tri_right_a")
-            with right_cols[1]:
-                right_b = st.checkbox("B □", key="tri_right_b")
-            with right_cols[2]:
-                right_c = st.checkbox("C □", key="tri_right_c")
-            with right_cols[3]:
-                right_size = st.number_input("Square size", min_value=0.1, step=0.1, key="tri_right_size")
-            
-            st.caption("Angle labels:")
-            alabel_cols = st.columns(4)
-            with alabel_cols[0]:
-                angle_a_label = st.text_input("A label", key="tri_alabel_a", placeholder="$\\alpha$")
-            with alabel_cols[1]:
-                angle_b_label = st.text_input("B label", key="tri_alabel_b", placeholder="$\\beta$")
-            with alabel_cols[2]:
-                angle_c_label = st.text_input("C label", key="tri_alabel_c", placeholder="$\\gamma$")
-            with alabel_cols[3]:
-                angle_label_dist = st.number_input("Label dist", min_value=0.2, step=0.1, key="tri_alabel_dist")
+            if show_angles:
+                st.caption("Show arcs at:")
+                angle_cols = st.columns(4)
+                with angle_cols[0]:
+                    show_angle_a = st.checkbox("Angle A", key="tri_angle_a")
+                with angle_cols[1]:
+                    show_angle_b = st.checkbox("Angle B", key="tri_angle_b")
+                with angle_cols[2]:
+                    show_angle_c = st.checkbox("Angle C", key="tri_angle_c")
+                with angle_cols[3]:
+                    angle_radius = st.number_input("Arc radius", min_value=0.1, step=0.1, key="tri_angle_radius")
+                
+                st.caption("Use square (right angle) marker instead:")
+                right_cols = st.columns(4)
+                with right_cols[0]:
+                    right_a = st.checkbox("A □", key="tri_right_a")
+                with right_cols[1]:
+                    right_b = st.checkbox("B □", key="tri_right_b")
+                with right_cols[2]:
+                    right_c = st.checkbox("C □", key="tri_right_c")
+                with right_cols[3]:
+                    right_size = st.number_input("Square size", min_value=0.1, step=0.1, key="tri_right_size")
+                
+                st.caption("Angle labels:")
+                alabel_cols = st.columns(4)
+                with alabel_cols[0]:
+                    angle_a_label = st.text_input("A label", key="tri_alabel_a", placeholder="$\\alpha$")
+                with alabel_cols[1]:
+                    angle_b_label = st.text_input("B label", key="tri_alabel_b", placeholder="$\\beta$")
+                with alabel_cols[2]:
+                    angle_c_label = st.text_input("C label", key="tri_alabel_c", placeholder="$\\gamma$")
+                with alabel_cols[3]:
+                    angle_label_dist = st.number_input("Label dist", min_value=0.2, step=0.1, key="tri_alabel_dist")
     
     # === TICKS TAB ===
     with tab_ticks:
-        show_ticks = st.checkbox("Show tick marks (for equal sides)", key="tri_show_ticks")
-        
-        if show_ticks:
-            st.write("")
-            tick_cols = st.columns(4)
-            with tick_cols[0]:
-                ticks_ab = st.number_input("Ticks on AB", min_value=0, max_value=3, key="tri_ticks_ab")
-            with tick_cols[1]:
-                ticks_bc = st.number_input("Ticks on BC", min_value=0, max_value=3, key="tri_ticks_bc")
-            with tick_cols[2]:
-                ticks_ca = st.number_input("Ticks on CA", min_value=0, max_value=3, key="tri_ticks_ca")
-            with tick_cols[3]:
-                tick_length = st.number_input("Tick length", min_value=0.05, step=0.05, key="tri_tick_length")
+        if tab_ticks.open:
+            show_ticks = st.checkbox("Show tick marks (for equal sides)", key="tri_show_ticks")
             
-            st.caption("Use the same number of ticks on sides of equal length.")
+            if show_ticks:
+                st.write("")
+                tick_cols = st.columns(4)
+                with tick_cols[0]:
+                    ticks_ab = st.number_input("Ticks on AB", min_value=0, max_value=3, key="tri_ticks_ab")
+                with tick_cols[1]:
+                    ticks_bc = st.number_input("Ticks on BC", min_value=0, max_value=3, key="tri_ticks_bc")
+                with tick_cols[2]:
+                    ticks_ca = st.number_input("Ticks on CA", min_value=0, max_value=3, key="tri_ticks_ca")
+                with tick_cols[3]:
+                    tick_length = st.number_input("Tick length", min_value=0.05, step=0.05, key="tri_tick_length")
+                
+                st.caption("Use the same number of ticks on sides of equal length.")
 
 
 # --- Build Triangle ---
-def build_triangle():
-    """Build triangle vertices from current input settings."""
-    try:
-        if input_method == "Side lengths (SSS)":
-            vertices = get_triangle_vertices_from_sss(
-                side_a, side_b, side_c,
-                base_center=(base_x, base_y),
-                base_angle=rotation
-            )
-        elif input_method == "Coordinates":
-            vertices = get_triangle_vertices_from_coordinates([
-                (ax_coord, ay_coord),
-                (bx_coord, by_coord),
-                (cx_coord, cy_coord)
-            ])
-        else:  # Presets
-            if preset_type == "Equilateral":
-                vertices = get_equilateral_triangle(preset_side)
-            elif preset_type == "Isoceles":
-                vertices = get_isoceles_triangle(preset_base, preset_leg)
-            elif preset_type == "Right triangle":
-                vertices = get_right_triangle(preset_base, preset_height)
-            elif preset_type == "30-60-90":
-                vertices = get_30_60_90_triangle(preset_short)
-            else:  # 45-45-90
-                vertices = get_45_45_90_triangle(preset_leg_45)
-            
-            # Apply rotation if needed
-            if preset_rotation != 0:
-                theta = np.radians(preset_rotation)
-                rot_matrix = np.array([
-                    [np.cos(theta), -np.sin(theta)],
-                    [np.sin(theta), np.cos(theta)]
-                ])
-                centroid = np.mean(vertices, axis=0)
-                vertices = np.array([rot_matrix @ (v - centroid) + centroid for v in vertices])
+# Preset builder and the session state keys holding its dimensions, in argument order
+PRESET_BUILDERS = {
+    "Equilateral": (get_equilateral_triangle, ("tri_preset_side",)),
+    "Isoceles": (get_isoceles_triangle, ("tri_preset_base", "tri_preset_leg")),
+    "Right triangle": (get_right_triangle, ("tri_preset_base_rt", "tri_preset_height")),
+    "30-60-90": (get_30_60_90_triangle, ("tri_preset_short",)),
+    "45-45-90": (get_45_45_90_triangle, ("tri_preset_leg_45",)),
+}
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def compute_vertices(input_method, sss, coords, preset, preset_rotation):
+    """
+    Triangle vertices for one definition, cached per input parameters.
+    
+    Args:
+        input_method: Which of the definition inputs is active
+        sss: (side_a, side_b, side_c, base_x, base_y, rotation) for side lengths
+        coords: ((x_A, y_A), (x_B, y_B), (x_C, y_C)) for coordinates
+        preset: (preset_type, *dimensions) for preset shapes
+        preset_rotation: Rotation of a preset shape in degrees
+    
+    Raises:
+        ValueError: If the side lengths violate the triangle inequality
+    """
+    if input_method == "Side lengths (SSS)":
+        side_a, side_b, side_c, base_x, base_y, rotation = sss
+        vertices = get_triangle_vertices_from_sss(
+            side_a, side_b, side_c,
+            base_center=(base_x, base_y),
+            base_angle=rotation
+        )
+    elif input_method == "Coordinates":
+        vertices = get_triangle_vertices_from_coordinates(list(coords))
+    else:  # Presets
+        preset_type, *dims = preset
+        builder, _ = PRESET_BUILDERS[preset_type]
+        vertices = builder(*dims)
         
-        return vertices
+        # Apply rotation if needed
+        if preset_rotation != 0:
+            theta = np.radians(preset_rotation)
+            c, s = np.cos(theta), np.sin(theta)
+            rot_matrix = np.array([[c, -s], [s, c]])
+            centroid = np.mean(vertices, axis=0)
+            # Rotate all vertices about the centroid in one product
+            vertices = (vertices - centroid) @ rot_matrix.T + centroid
+    
+    return vertices
+
+
+def build_triangle(ss):
+    """Build triangle vertices from a snapshot of the input settings."""
+    input_method = ss["tri_input_method"]
+    sss = coords = preset = None
+    if input_method == "Side lengths (SSS)":
+        sss = tuple(key_float(ss[key]) for key in (
+            "tri_side_a", "tri_side_b", "tri_side_c", "tri_base_x", "tri_base_y", "tri_rotation"
+        ))
+    elif input_method == "Coordinates":
+        coords = (
+            (key_float(ss["tri_ax"]), key_float(ss["tri_ay"])),
+            (key_float(ss["tri_bx"]), key_float(ss["tri_by"])),
+            (key_float(ss["tri_cx"]), key_float(ss["tri_cy"])),
+        )
+    else:  # Presets
+        preset_type = ss["tri_preset_type"]
+        _, dim_keys = PRESET_BUILDERS[preset_type]
+        preset = (preset_type, *(key_float(ss[key]) for key in dim_keys))
+    
+    try:
+        return compute_vertices(
+            input_method, sss, coords, preset,
+            key_float(ss["tri_preset_rotation"]) if preset is not None else 0
+        )
     except ValueError as e:
         st.error(f"Invalid triangle: {str(e)}")
         return None
 
 
-def render_triangle(vertices):
-    """Render the triangle with all configured options."""
+def draw_triangle_figure(vertices, padding, axis_weight, label_size, white_background,
+                         tri_color, tri_line_style, tri_fill, tri_fill_color, tri_fill_alpha,
+                         vertex_labels, vertex_label_dist, side_labels, angle_markers,
+                         angle_radius, right_size, angle_label_dist, tick_marks, tick_length):
+    """
+    Draw the triangle with all configured options.
+    
+    Vertices come from compute_vertices and the labels and marks from
+    triangle_spec, so nothing here reads session state.
+    
+    Returns:
+        Matplotlib figure
+    """
+    vertices = np.array(vertices)
     
     # Create figure
     fig, ax = plt.subplots(figsize=(fig_width, fig_height))
     ax.set_aspect('equal')
     ax.axis('off')
+    # The axes fill the figure and the limits already include the padding,
+    # so no tight_layout pass is needed
+    fig.subplots_adjust(left=0, right=1, bottom=0, top=1)
     
     # Set limits with padding
     auto_set_limits(ax, vertices, padding=padding)
@@ -407,14 +484,16 @@ def render_triangle(vertices):
     apply_figure_style(fig, ax, white_background)
     
     line_width = axis_weight * 1.3
-    line_style_map = {"solid": "-", "dashed": "--", "dotted": ":"}
+    # Angle markers and tick marks use a thinner line than the outline
+    thin_lw = line_width * 0.7
+    stroke = MY_COLORS[tri_color]
     
     # Draw triangle
     draw_triangle(
         ax, vertices,
-        color=MY_COLORS[tri_color],
+        color=stroke,
         line_width=line_width,
-        line_style=line_style_map[tri_line_style],
+        line_style=LINE_STYLE_MAP[tri_line_style],
         fill=tri_fill,
         fill_color=MY_COLORS[tri_fill_color] if tri_fill else None,
         fill_alpha=tri_fill_alpha,
@@ -422,108 +501,160 @@ def render_triangle(vertices):
     )
     
     # Draw vertex labels
-    if show_vertex_labels:
-        labels = [vertex_a_label, vertex_b_label, vertex_c_label]
-        for i, label_text in enumerate(labels):
-            if label_text:
-                draw_vertex_label(
-                    ax, vertices, i, label_text,
-                    color=MY_COLORS[tri_color],
-                    font_size=label_size,
-                    distance=vertex_label_dist,
-                    direction='auto',
-                    zorder=50,
-                    white_background=white_background
-                )
+    for i, label_text in vertex_labels:
+        draw_vertex_label(
+            ax, vertices, i, label_text,
+            color=stroke,
+            font_size=label_size,
+            distance=vertex_label_dist,
+            direction='auto',
+            zorder=50,
+            white_background=white_background
+        )
     
     # Draw side labels
-    if show_side_labels:
-        for side_idx in range(3):
-            label_text = st.session_state.get(f"tri_slabel_{side_idx}", "")
-            if label_text:
-                draw_side_label(
-                    ax, vertices, side_idx, label_text,
-                    color=MY_COLORS[tri_color],
-                    font_size=label_size,
-                    position=st.session_state.get(f"tri_slabel_pos_{side_idx}", 0.5),
-                    direction=st.session_state.get(f"tri_slabel_dir_{side_idx}", "auto"),
-                    distance=st.session_state.get(f"tri_slabel_dist_{side_idx}", 0.4),
-                    rotate_with_side=False,
-                    zorder=50,
-                    white_background=white_background
-                )
+    for side_idx, label_text, position, direction, distance in side_labels:
+        draw_side_label(
+            ax, vertices, side_idx, label_text,
+            color=stroke,
+            font_size=label_size,
+            position=position,
+            direction=direction,
+            distance=distance,
+            rotate_with_side=False,
+            zorder=50,
+            white_background=white_background
+        )
     
     # Draw angle markers
-    if show_angles:
-        angle_shows = [show_angle_a, show_angle_b, show_angle_c]
-        right_angles = [right_a, right_b, right_c]
-        angle_labels = [angle_a_label, angle_b_label, angle_c_label]
-        
-        for i in range(3):
-            if angle_shows[i]:
-                if right_angles[i]:
-                    draw_right_angle_marker(
-                        ax, vertices, i,
-                        color=MY_COLORS[tri_color],
-                        line_width=line_width * 0.7,
-                        size=right_size,
-                        zorder=15
-                    )
-                else:
-                    draw_angle_arc(
-                        ax, vertices, i,
-                        color=MY_COLORS[tri_color],
-                        line_width=line_width * 0.7,
-                        radius=angle_radius,
-                        zorder=15
-                    )
-                
-                if angle_labels[i]:
-                    draw_angle_label(
-                        ax, vertices, i, angle_labels[i],
-                        color=MY_COLORS[tri_color],
-                        font_size=label_size,
-                        distance=angle_label_dist,
-                        direction='auto',
-                        zorder=50,
-                        white_background=white_background
-                    )
+    draw_angle_markers(
+        ax, vertices,
+        [i for i, use_right, _ in angle_markers if not use_right],
+        [i for i, use_right, _ in angle_markers if use_right],
+        color=stroke,
+        line_width=thin_lw,
+        radius=angle_radius,
+        size=right_size,
+        zorder=15
+    )
+    for i, _, angle_label in angle_markers:
+        if angle_label:
+            draw_angle_label(
+                ax, vertices, i, angle_label,
+                color=stroke,
+                font_size=label_size,
+                distance=angle_label_dist,
+                direction='auto',
+                zorder=50,
+                white_background=white_background
+            )
     
     # Draw tick marks
-    if show_ticks:
-        ticks = [ticks_ab, ticks_bc, ticks_ca]
-        for side_idx, num_ticks in enumerate(ticks):
-            if num_ticks > 0:
-                draw_tick_marks(
-                    ax, vertices, side_idx, num_ticks,
-                    color=MY_COLORS[tri_color],
-                    line_width=line_width * 0.7,
-                    tick_length=tick_length,
-                    zorder=20
-                )
-    
-    fig.tight_layout()
+    for side_idx, num_ticks in tick_marks:
+        draw_tick_marks(
+            ax, vertices, side_idx, num_ticks,
+            color=stroke,
+            line_width=thin_lw,
+            tick_length=tick_length,
+            zorder=20
+        )
+    
     return fig
 
 
+@st.cache_data(show_spinner=False, max_entries=32)
+def render_triangle(spec):
+    """
+    Preview PNG of the triangle at 200 dpi with a tight bounding box, kept
+    per spec so reruns from widgets that do not change the triangle skip drawing.
+    """
+    fig = draw_triangle_figure(*spec)
+    preview_buffer = io.BytesIO()
+    fig.savefig(preview_buffer, format="png", dpi=200, bbox_inches="tight")
+    plt.close(fig)
+    return preview_buffer.getvalue()
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def export_triangle(spec):
+    """Export bytes (SVG, PNG) for the triangle downloads, made on the first click."""
+    fig = draw_triangle_figure(*spec)
+    svg_data, png_data = export_figure(fig)
+    plt.close(fig)
+    return svg_data, png_data
+
+
+def triangle_spec(ss, vertices):
+    """Pair the solved vertices with the style, label and mark settings in ss as the
+    hashable spec that render_triangle and export_triangle key on."""
+    vertex_keys = ['a', 'b', 'c']
+    
+    show_vlabels = ss["tri_show_vlabels"]
+    vertex_labels = tuple(
+        (i, ss[f"tri_vlabel_{vk}"])
+        for i, vk in enumerate(vertex_keys)
+        if show_vlabels and ss[f"tri_vlabel_{vk}"]
+    )
+    
+    show_slabels = ss["tri_show_slabels"]
+    side_labels = tuple(
+        (side_idx, ss[f"tri_slabel_{side_idx}"], key_float(ss[f"tri_slabel_pos_{side_idx}"]),
+         ss[f"tri_slabel_dir_{side_idx}"], key_float(ss[f"tri_slabel_dist_{side_idx}"]))
+        for side_idx in range(3)
+        if show_slabels and ss[f"tri_slabel_{side_idx}"]
+    )
+    
+    show_angles = ss["tri_show_angles"]
+    angle_markers = tuple(
+        (i, ss[f"tri_right_{vk}"], ss[f"tri_alabel_{vk}"])
+        for i, vk in enumerate(vertex_keys)
+        if show_angles and ss[f"tri_angle_{vk}"]
+    )
+    
+    show_ticks = ss["tri_show_ticks"]
+    tick_marks = tuple(
+        (side_idx, ss[f"tri_ticks_{sk}"])
+        for side_idx, sk in enumerate(['ab', 'bc', 'ca'])
+        if show_ticks and ss[f"tri_ticks_{sk}"] > 0
+    )
+    
+    tri_fill = ss["tri_fill"]
+    return (
+        tuple(map(tuple, np.round(vertices, KEY_DECIMALS).tolist())),
+        padding, axis_weight, label_size, white_background,
+        ss["tri_color"], ss["tri_line_style"], tri_fill,
+        ss["tri_fill_color"] if tri_fill else ss["tri_color"],
+        key_float(ss["tri_fill_alpha"]) if tri_fill else 0.2,
+        vertex_labels,
+        key_float(ss["tri_vlabel_dist"]) if show_vlabels else None,
+        side_labels,
+        angle_markers,
+        key_float(ss["tri_angle_radius"]) if show_angles else None,
+        key_float(ss["tri_right_size"]) if show_angles else None,
+        key_float(ss["tri_alabel_dist"]) if show_angles else None,
+        tick_marks,
+        key_float(ss["tri_tick_length"]) if show_ticks else None,
+    )
+
+
 # --- Main Rendering Logic ---
-vertices = build_triangle()
+# One snapshot of session state for every lookup below
+ss = st.session_state.to_dict()
+vertices = build_triangle(ss)
 
 if vertices is not None:
     # Render the triangle
-    fig = render_triangle(vertices)
+    spec = triangle_spec(ss, vertices)
     
     # Display
-    plot_placeholder.pyplot(fig)
+    plot_placeholder.image(render_triangle(spec), width="stretch")
     
-    # Download buttons
-    create_download_buttons(fig, svg_placeholder, png_placeholder, "triangle")
+    # Download buttons, rendered only when clicked
+    show_download_buttons(lambda: export_triangle(spec)[0], lambda: export_triangle(spec)[1],
+                          svg_placeholder, png_placeholder, "triangle")
     
     # Show computed info at bottom of controls
     with col_controls:
-        angles = [get_vertex_angle(vertices, i) for i in range(3)]
-        sides = [get_side_length(vertices, i) for i in range(3)]
+        angles, sides = get_triangle_metrics(vertices)
         
         st.caption(f"**Angles:** A={angles[0]:.1f}°, B={angles[1]:.1f}°, C={angles[2]:.1f}° · **Sides:** AB={sides[0]:.2f}, BC={sides[1]:.2f}, CA={sides[2]:.2f}")
-    
-    plt.close(fig)
@@ -5,8 +5,10 @@ Supports various quadrilateral types with labeled vertices, sides, angles, and m
 
 import numpy as np
 import matplotlib.pyplot as plt
-from matplotlib.patches import Arc, Polygon, FancyArrowPatch
+from matplotlib.patches import Polygon, FancyArrowPatch
 from matplotlib.lines import Line2D
+from matplotlib.collections import LineCollection
+from functools import lru_cache
 
 
 # Direction vectors for label positioning
@@ -22,32 +24,50 @@ DIRECTIONS = {
 }
 
 
-def get_quadrilateral_vertices_from_coordinates(coords):
+def get_centroid(vertices):
+    """Get the centroid of a quadrilateral."""
+    return np.mean(vertices, axis=0)
+
+
+def get_side_vectors(vertices):
     """
-    Create vertices array from coordinate list.
+    Get the vector and length of every side in one pass.
     
-    Args:
-        coords: List of 4 (x, y) tuples for vertices A, B, C, D
+    Returns:
+        (side_vecs, side_lens) where side i runs from vertex i to vertex i+1
+    """
+    side_vecs = np.roll(vertices, -1, axis=0) - vertices
+    side_lens = np.linalg.norm(side_vecs, axis=1)
+    return side_vecs, side_lens
+
+
+def get_outward_signs(vertices, side_vecs, centroid):
+    """
+    Get, for every side, the sign that turns its left-hand normal
+    (-dy, dx) away from the centroid.
     
     Returns:
-        numpy array of shape (4, 2)
+        Array of +1/-1, one per side
     """
-    return np.array(coords)
+    to_centroid = np.asarray(centroid) - vertices
+    cross = side_vecs[:, 0] * to_centroid[:, 1] - side_vecs[:, 1] * to_centroid[:, 0]
+    return np.where(cross > 0, -1.0, 1.0)
 
 
-def get_centroid(vertices):
-    """Get the centroid of a quadrilateral."""
-    return np.mean(vertices, axis=0)
+@lru_cache(maxsize=128)
+def rotation_matrix(angle_deg):
+    """2x2 rotation matrix for an angle in degrees, cached per angle (read-only)."""
+    angle_rad = np.radians(angle_deg)
+    cos_a, sin_a = np.cos(angle_rad), np.sin(angle_rad)
+    matrix = np.array([[cos_a, -sin_a], [sin_a, cos_a]])
+    matrix.setflags(write=False)
+    return matrix
 
 
 def rotate_points(points, angle_deg, center=(0, 0)):
     """Rotate points around a center by given angle in degrees."""
-    angle_rad = np.radians(angle_deg)
-    cos_a, sin_a = np.cos(angle_rad), np.sin(angle_rad)
-    rotation_matrix = np.array([[cos_a, -sin_a], [sin_a, cos_a]])
-    
     centered = points - np.array(center)
-    rotated = np.dot(centered, rotation_matrix.T)
+    rotated = np.dot(centered, rotation_matrix(float(angle_deg)).T)
     return rotated + np.array(center)
 
 
@@ -251,7 +271,8 @@ def draw_vertex_label(ax, vertex, label, direction='auto', distance=0.5,
 
 def draw_side_label(ax, p1, p2, label, position=0.5, direction='auto', distance=0.4,
                     color='#4C5B64', font_size=14, centroid=None,
-                    white_background=True, zorder=100):
+                    white_background=True, zorder=100, side_vec=None, side_len=None,
+                    outward_sign=None):
     """
     Draw a label along a side.
     
@@ -262,6 +283,8 @@ def draw_side_label(ax, p1, p2, label, position=0.5, direction='auto', distance=
         direction: 'auto', 'above', 'below', 'left', 'right'
         distance: Perpendicular distance from side
         centroid: Center of shape (for auto direction)
+        side_vec, side_len: Precomputed p2 - p1 and its length, if available
+        outward_sign: Precomputed sign from get_outward_signs (for auto direction)
     """
     if not label:
         return
@@ -270,11 +293,15 @@ def draw_side_label(ax, p1, p2, label, position=0.5, direction='auto', distance=
     mid = np.array(p1) * (1 - position) + np.array(p2) * position
     
     # Perpendicular direction
-    side_vec = np.array(p2) - np.array(p1)
+    if side_vec is None:
+        side_vec = np.array(p2) - np.array(p1)
+        side_len = np.linalg.norm(side_vec)
     perp = np.array([-side_vec[1], side_vec[0]])
-    perp = perp / (np.linalg.norm(perp) + 1e-10)
+    perp = perp / (side_len + 1e-10)
     
-    if direction == 'auto' and centroid is not None:
+    if direction == 'auto' and outward_sign is not None:
+        perp = perp * outward_sign
+    elif direction == 'auto' and centroid is not None:
         # Point away from centroid
         to_centroid = np.array(centroid) - mid
         if np.dot(perp, to_centroid) > 0:
@@ -322,63 +349,52 @@ def get_vertex_angle(vertices, vertex_idx):
     return np.degrees(np.arccos(cos_angle))
 
 
-def draw_angle_arc(ax, vertices, vertex_idx, radius=0.5, color='#4C5B64', 
-                   line_width=2, zorder=15):
-    """
-    Draw an arc showing the interior angle at a vertex.
+def draw_angle_markers(ax, vertices, arc_indices, right_indices, radius=0.5, size=0.4,
+                       color='#4C5B64', line_width=2, zorder=15, arc_points=48):
     """
-    n = len(vertices)
-    prev_idx = (vertex_idx - 1) % n
-    next_idx = (vertex_idx + 1) % n
-    
-    v = vertices[vertex_idx]
-    v_prev = vertices[prev_idx]
-    v_next = vertices[next_idx]
+    Draw interior angle arcs and right angle markers as a single LineCollection.
     
-    vec1 = v_prev - v
-    vec2 = v_next - v
-    
-    angle1 = np.degrees(np.arctan2(vec1[1], vec1[0]))
-    angle2 = np.degrees(np.arctan2(vec2[1], vec2[0]))
-    
-    # Ensure we draw the interior angle (smaller arc)
-    if angle1 > angle2:
-        angle1, angle2 = angle2, angle1
-    if angle2 - angle1 > 180:
-        angle1, angle2 = angle2, angle1 + 360
-    
-    arc = Arc(v, 2*radius, 2*radius, angle=0, theta1=angle1, theta2=angle2,
-              color=color, linewidth=line_width, zorder=zorder)
-    ax.add_patch(arc)
-
-
-def draw_right_angle_marker(ax, vertices, vertex_idx, size=0.4, color='#4C5B64',
-                            line_width=2, zorder=15):
-    """
-    Draw a square marker indicating a right angle.
-    """
-    n = len(vertices)
-    prev_idx = (vertex_idx - 1) % n
-    next_idx = (vertex_idx + 1) % n
-    
-    v = vertices[vertex_idx]
-    v_prev = vertices[prev_idx]
-    v_next = vertices[next_idx]
-    
-    # Unit vectors along each side
-    vec1 = v_prev - v
-    vec1 = vec1 / (np.linalg.norm(vec1) + 1e-10) * size
-    
-    vec2 = v_next - v
-    vec2 = vec2 / (np.linalg.norm(vec2) + 1e-10) * size
-    
-    # Draw the square
-    p1 = v + vec1
-    p2 = v + vec1 + vec2
-    p3 = v + vec2
-    
-    ax.plot([p1[0], p2[0], p3[0]], [p1[1], p2[1], p3[1]], 
-            color=color, linewidth=line_width, zorder=zorder)
+    Args:
+        vertices: Array of quadrilateral vertices
+        arc_indices: Vertex indices that get an angle arc
+        right_indices: Vertex indices that get a right angle marker
+        radius: Arc radius
+        size: Right angle marker size
+        arc_points: Number of points sampled along each arc
+    """
+    vertices = np.asarray(vertices, dtype=float)
+    vec_prev = np.roll(vertices, 1, axis=0) - vertices
+    vec_next = np.roll(vertices, -1, axis=0) - vertices
+    segments = []
+    
+    arc_indices = np.asarray(arc_indices, dtype=int)
+    if arc_indices.size:
+        angle1 = np.arctan2(vec_prev[arc_indices, 1], vec_prev[arc_indices, 0])
+        angle2 = np.arctan2(vec_next[arc_indices, 1], vec_next[arc_indices, 0])
+        # Ensure we draw the interior angle (smaller arc)
+        start = np.minimum(angle1, angle2)
+        end = np.maximum(angle1, angle2)
+        wrap = end - start > np.pi
+        start, end = np.where(wrap, end, start), np.where(wrap, start + 2 * np.pi, end)
+        
+        t = start[:, None] + (end - start)[:, None] * np.linspace(0, 1, arc_points)
+        arcs = vertices[arc_indices, None, :] + radius * np.stack([np.cos(t), np.sin(t)], axis=-1)
+        segments.extend(arcs)
+    
+    right_indices = np.asarray(right_indices, dtype=int)
+    if right_indices.size:
+        u1 = vec_prev[right_indices]
+        u1 = u1 / (np.linalg.norm(u1, axis=1, keepdims=True) + 1e-10) * size
+        u2 = vec_next[right_indices]
+        u2 = u2 / (np.linalg.norm(u2, axis=1, keepdims=True) + 1e-10) * size
+        v = vertices[right_indices]
+        segments.extend(np.stack([v + u1, v + u1 + u2, v + u2], axis=1))
+    
+    if segments:
+        ax.add_collection(LineCollection(
+            segments, colors=color, linewidths=line_width,
+            capstyle='butt', joinstyle='round', zorder=zorder
+        ))
 
 
 def draw_angle_label(ax, vertices, vertex_idx, label, radius=0.5, distance=0.3,
@@ -416,16 +432,20 @@ def draw_angle_label(ax, vertices, vertex_idx, label, radius=0.5, distance=0.3,
 
 
 def draw_tick_marks(ax, p1, p2, num_ticks, tick_length=0.25, color='#4C5B64',
-                    line_width=2, zorder=20):
+                    line_width=2, zorder=20, side_vec=None, side_len=None):
     """
     Draw tick marks on a side to indicate equal lengths.
+    
+    Args:
+        side_vec, side_len: Precomputed p2 - p1 and its length, if available
     """
     if num_ticks <= 0:
         return
     
     mid = (np.array(p1) + np.array(p2)) / 2
-    side_vec = np.array(p2) - np.array(p1)
-    side_len = np.linalg.norm(side_vec)
+    if side_vec is None:
+        side_vec = np.array(p2) - np.array(p1)
+        side_len = np.linalg.norm(side_vec)
     
     # Perpendicular direction
     perp = np.array([-side_vec[1], side_vec[0]])
@@ -444,19 +464,21 @@ def draw_tick_marks(ax, p1, p2, num_ticks, tick_length=0.25, color='#4C5B64',
 
 
 def draw_parallel_marks(ax, p1, p2, num_arrows, arrow_size=0.3, color='#4C5B64',
-                        line_width=2, zorder=20):
+                        line_width=2, zorder=20, side_vec=None, side_len=None):
     """
     Draw arrow marks on a side to indicate parallel sides.
     
     Args:
         num_arrows: Number of arrow heads (1, 2, or 3)
+        side_vec, side_len: Precomputed p2 - p1 and its length, if available
     """
     if num_arrows <= 0:
         return
     
     mid = (np.array(p1) + np.array(p2)) / 2
-    side_vec = np.array(p2) - np.array(p1)
-    side_len = np.linalg.norm(side_vec)
+    if side_vec is None:
+        side_vec = np.array(p2) - np.array(p1)
+        side_len = np.linalg.norm(side_vec)
     unit_vec = side_vec / (side_len + 1e-10)
     
     # Perpendicular for arrow wings
@@ -46,15 +46,38 @@ def get_color_options():
     return list(MY_COLORS.keys())
 
 
-def create_download_buttons(fig, svg_placeholder, png_placeholder, filename_base="figure"):
+def figure_to_png(fig, dpi=300):
     """
-    Create SVG and PNG download buttons for a matplotlib figure.
+    Render a figure to PNG bytes, cropped to its content like the other exports.
+    
+    Keeps savefig's tight bounding box but has Pillow encode at a low zlib
+    level, which is several times faster on large canvases for a slightly
+    bigger file.
     
     Args:
         fig: Matplotlib figure
-        svg_placeholder: Streamlit placeholder for SVG button
-        png_placeholder: Streamlit placeholder for PNG button
-        filename_base: Base name for downloaded files
+        dpi: Resolution to render at
+    
+    Returns:
+        PNG image as bytes
+    """
+    png_buffer = io.BytesIO()
+    fig.savefig(png_buffer, format="png", dpi=dpi, bbox_inches="tight", pad_inches=0,
+                pil_kwargs={"optimize": False, "compress_level": 1})
+    png_data = png_buffer.getvalue()
+    png_buffer.close()
+    return png_data
+
+
+def export_figure(fig):
+    """
+    Render a matplotlib figure to the SVG and PNG bytes offered for download.
+    
+    Args:
+        fig: Matplotlib figure
+    
+    Returns:
+        (svg_data, png_data) tuple
     """
     # SVG export
     svg_buffer = io.StringIO()
@@ -62,13 +85,6 @@ def create_download_buttons(fig, svg_placeholder, png_placeholder, filename_base
     svg_data = svg_buffer.getvalue()
     svg_buffer.close()
     
-    svg_placeholder.download_button(
-        label="Download SVG",
-        data=svg_data,
-        file_name=f"{filename_base}.svg",
-        mime="image/svg+xml",
-    )
-    
     # PNG export
     png_buffer = io.BytesIO()
     fig.savefig(png_buffer, format="png", dpi=300, bbox_inches="tight", pad_inches=0.1)
@@ -76,6 +92,27 @@ def create_download_buttons(fig, svg_placeholder, png_placeholder, filename_base
     png_data = png_buffer.getvalue()
     png_buffer.close()
     
+    return svg_data, png_data
+
+
+def show_download_buttons(svg_data, png_data, svg_placeholder, png_placeholder, filename_base="figure"):
+    """
+    Create SVG and PNG download buttons for already rendered figure bytes.
+    
+    Args:
+        svg_data: SVG document as a string, or a callable returning it on click
+        png_data: PNG image as bytes, or a callable returning it on click
+        svg_placeholder: Streamlit placeholder for SVG button
+        png_placeholder: Streamlit placeholder for PNG button
+        filename_base: Base name for downloaded files
+    """
+    svg_placeholder.download_button(
+        label="Download SVG",
+        data=svg_data,
+        file_name=f"{filename_base}.svg",
+        mime="image/svg+xml",
+    )
+    
     png_placeholder.download_button(
         label="Download PNG",
         data=png_data,
@@ -84,6 +121,20 @@ def create_download_buttons(fig, svg_placeholder, png_placeholder, filename_base
     )
 
 
+def create_download_buttons(fig, svg_placeholder, png_placeholder, filename_base="figure"):
+    """
+    Create SVG and PNG download buttons for a matplotlib figure.
+    
+    Args:
+        fig: Matplotlib figure
+        svg_placeholder: Streamlit placeholder for SVG button
+        png_placeholder: Streamlit placeholder for PNG button
+        filename_base: Base name for downloaded files
+    """
+    svg_data, png_data = export_figure(fig)
+    show_download_buttons(svg_data, png_data, svg_placeholder, png_placeholder, filename_base)
+
+
 def setup_figure_appearance_controls(sidebar=True, key_prefix=""):
     """
     Common appearance controls for figure dimensions and background.
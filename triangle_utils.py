@@ -5,9 +5,10 @@ Provides functions to draw triangles with labeled sides, angles, and special mar
 
 import numpy as np
 import matplotlib.pyplot as plt
-from matplotlib.patches import Arc, FancyBboxPatch, Rectangle, Polygon
+from matplotlib.patches import FancyBboxPatch, Rectangle, Polygon
 from matplotlib.transforms import Affine2D
 import matplotlib.patches as mpatches
+from matplotlib.collections import LineCollection
 
 
 # Direction vectors for label positioning (TikZ-style)
@@ -24,6 +25,14 @@ DIRECTIONS = {
     'auto': None  # Will be computed based on context
 }
 
+# Unit circle sampled once per degree; angle arcs are sliced from it
+# instead of evaluating cos/sin for every arc
+UNIT_CIRCLE_STEP = np.radians(1.0)
+UNIT_CIRCLE = np.column_stack((
+    np.cos(np.arange(360) * UNIT_CIRCLE_STEP),
+    np.sin(np.arange(360) * UNIT_CIRCLE_STEP)
+))
+
 
 def get_triangle_vertices_from_sss(a, b, c, base_center=(0, 0), base_angle=0):
     """
@@ -296,6 +305,29 @@ def get_vertex_angle(vertices, vertex_index):
     return np.degrees(np.arccos(cos_angle))
 
 
+def get_triangle_metrics(vertices):
+    """
+    Get all interior angles and side lengths in one vectorized pass.
+    
+    Args:
+        vertices: numpy array of shape (3, 2)
+    
+    Returns:
+        (angles, sides) tuple of numpy arrays of shape (3,): angles in degrees
+        at A, B, C and the lengths of sides A-B, B-C, C-A
+    """
+    # Side i runs from vertex i to the next vertex
+    edges = np.roll(vertices, -1, axis=0) - vertices
+    sides = np.linalg.norm(edges, axis=1)
+    
+    # The angle at vertex i lies between the reversed previous side and side i
+    prev_edges = np.roll(edges, 1, axis=0)
+    cos_angles = np.einsum('ij,ij->i', -prev_edges, edges) / (np.roll(sides, 1) * sides)
+    angles = np.degrees(np.arccos(np.clip(cos_angles, -1, 1)))
+    
+    return angles, sides
+
+
 def get_angle_bisector_direction(vertices, vertex_index):
     """
     Get the direction of the angle bisector at a vertex (pointing inward).
@@ -328,87 +360,61 @@ def get_angle_bisector_direction(vertices, vertex_index):
     return bisector
 
 
-def draw_angle_arc(ax, vertices, vertex_index, color, line_width,
-                   radius=0.4, zorder=10):
-    """
-    Draw an arc marking the angle at a vertex.
-    
-    Args:
-        ax: Matplotlib axes
-        vertices: numpy array of shape (3, 2)
-        vertex_index: 0, 1, or 2
-        color: Arc color
-        line_width: Line width
-        radius: Arc radius (in data units)
-        zorder: Drawing order
-    """
-    i = vertex_index
-    prev_i = (i - 1) % 3
-    next_i = (i + 1) % 3
-    
-    vertex = vertices[i]
-    
-    # Vectors to adjacent vertices
-    v1 = vertices[prev_i] - vertex
-    v2 = vertices[next_i] - vertex
-    
-    # Angles of these vectors
-    angle1 = np.degrees(np.arctan2(v1[1], v1[0]))
-    angle2 = np.degrees(np.arctan2(v2[1], v2[0]))
-    
-    # Ensure we draw the interior angle (shorter arc)
-    # Normalize angles to [0, 360)
-    angle1 = angle1 % 360
-    angle2 = angle2 % 360
-    
-    # Determine which direction to draw the arc
-    diff = (angle2 - angle1) % 360
-    if diff > 180:
-        angle1, angle2 = angle2, angle1
-    
-    # Create arc
-    arc = Arc(vertex, 2*radius, 2*radius, 
-              angle=0, theta1=angle1, theta2=angle2,
-              color=color, linewidth=line_width, zorder=zorder)
-    ax.add_patch(arc)
-
-
-def draw_right_angle_marker(ax, vertices, vertex_index, color, line_width,
-                            size=0.3, zorder=10):
+def draw_angle_markers(ax, vertices, arc_indices, right_indices, color, line_width,
+                       radius=0.4, size=0.3, zorder=10):
     """
-    Draw a small square to mark a right angle.
+    Draw angle arcs and right angle markers as a single LineCollection.
     
     Args:
         ax: Matplotlib axes
         vertices: numpy array of shape (3, 2)
-        vertex_index: 0, 1, or 2
+        arc_indices: Vertex indices that get an angle arc
+        right_indices: Vertex indices that get a right angle marker
         color: Marker color
         line_width: Line width
-        size: Size of the square (in data units)
+        radius: Arc radius (in data units)
+        size: Size of the right angle squares (in data units)
         zorder: Drawing order
     """
-    i = vertex_index
-    prev_i = (i - 1) % 3
-    next_i = (i + 1) % 3
-    
-    vertex = vertices[i]
-    
-    # Unit vectors along the two sides
-    v1 = vertices[prev_i] - vertex
-    v1 = v1 / np.linalg.norm(v1)
-    v2 = vertices[next_i] - vertex
-    v2 = v2 / np.linalg.norm(v2)
-    
-    # Four corners of the right angle marker
-    p1 = vertex + size * v1
-    p2 = vertex + size * v1 + size * v2
-    p3 = vertex + size * v2
-    
-    # Draw the two lines of the square
-    ax.plot([p1[0], p2[0]], [p1[1], p2[1]], 
-            color=color, linewidth=line_width, zorder=zorder)
-    ax.plot([p2[0], p3[0]], [p2[1], p3[1]], 
-            color=color, linewidth=line_width, zorder=zorder)
+    vertices = np.asarray(vertices, dtype=float)
+    # Unit vectors from each vertex to its two neighbours
+    vec_prev = np.roll(vertices, 1, axis=0) - vertices
+    vec_prev = vec_prev / np.linalg.norm(vec_prev, axis=1, keepdims=True)
+    vec_next = np.roll(vertices, -1, axis=0) - vertices
+    vec_next = vec_next / np.linalg.norm(vec_next, axis=1, keepdims=True)
+    segments = []
+    
+    arc_indices = np.asarray(arc_indices, dtype=int)
+    if arc_indices.size:
+        angle1 = np.arctan2(vec_prev[arc_indices, 1], vec_prev[arc_indices, 0])
+        angle2 = np.arctan2(vec_next[arc_indices, 1], vec_next[arc_indices, 0])
+        # Ensure we draw the interior angle (shorter arc)
+        wrap = np.abs(angle2 - angle1) > np.pi
+        prev_first = (angle1 <= angle2) != wrap
+        start = np.where(prev_first, angle1, angle2)
+        end = start + (np.where(prev_first, angle2, angle1) - start) % (2 * np.pi)
+        
+        # Table points strictly inside each arc, between the exact side directions
+        first = np.floor(start / UNIT_CIRCLE_STEP).astype(int) + 1
+        last = np.ceil(end / UNIT_CIRCLE_STEP).astype(int) - 1
+        for k, i in enumerate(arc_indices):
+            inner = UNIT_CIRCLE.take(np.arange(first[k], last[k] + 1), axis=0, mode='wrap')
+            u_start, u_end = (vec_prev[i], vec_next[i]) if prev_first[k] else (vec_next[i], vec_prev[i])
+            segments.append(vertices[i] + radius * np.vstack([u_start, inner, u_end]))
+    
+    right_indices = np.asarray(right_indices, dtype=int)
+    if right_indices.size:
+        # Side directions scaled to the marker size
+        u1 = vec_prev[right_indices] * size
+        u2 = vec_next[right_indices] * size
+        v = vertices[right_indices]
+        segments.extend(np.stack([v + u1, v + u1 + u2, v + u2], axis=1))
+    
+    if segments:
+        ax.add_collection(LineCollection(
+            segments, colors=color, linewidths=line_width,
+            capstyle='butt', joinstyle='round', zorder=zorder
+        ))
 
 
 def draw_angle_label(ax, vertices, vertex_index, label_text, color, font_size,
@@ -537,19 +543,17 @@ def draw_tick_marks(ax, vertices, side_index, num_ticks, color, line_width,
     # Spacing between ticks
     tick_spacing = tick_length * 0.8
     
-    # Calculate tick positions
-    start_offset = -((num_ticks - 1) / 2) * tick_spacing
-    
-    for t in range(num_ticks):
-        offset = start_offset + t * tick_spacing
-        tick_center = midpoint + offset * side_dir
-        
-        # Draw tick perpendicular to side
-        p1 = tick_center - (tick_length / 2) * outward
-        p2 = tick_center + (tick_length / 2) * outward
-        
-        ax.plot([p1[0], p2[0]], [p1[1], p2[1]],
-                color=color, linewidth=line_width, zorder=zorder)
+    # Tick centers, spread evenly about the midpoint along the side
+    offsets = (np.arange(num_ticks) - (num_ticks - 1) / 2) * tick_spacing
+    tick_centers = midpoint + offsets[:, None] * side_dir
+    
+    # Each tick runs perpendicular to the side, all drawn as one collection
+    half_tick = (tick_length / 2) * outward
+    segments = np.stack([tick_centers - half_tick, tick_centers + half_tick], axis=1)
+    ax.add_collection(LineCollection(
+        segments, colors=color, linewidths=line_width,
+        capstyle='projecting', zorder=zorder
+    ))
 
 
 def create_triangle_figure(figsize=(8, 8), equal_aspect=True):